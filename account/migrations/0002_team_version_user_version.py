@@ -0,0 +1,23 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Incremented on every update, used for conditional GET.', verbose_name='version'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Incremented on every update, used for conditional GET.', verbose_name='version'),
+        ),
+    ]
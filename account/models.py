@@ -8,11 +8,12 @@ from django.core.exceptions import ValidationError
 from django.utils.crypto import get_random_string
 
 from utils.utils import get_uuid_hex
+from utils.models import VersionedModel
 
 from account.managers import UserManager, TeamManager
 
 
-class User(AbstractUser):
+class User(VersionedModel, AbstractUser):
     username = None
 
     uid = models.CharField(
@@ -45,7 +46,7 @@ class User(AbstractUser):
         ))
 
 
-class Team(models.Model):
+class Team(VersionedModel):
     code = models.CharField(
         _('code'), max_length=32,
         primary_key=True, default=get_uuid_hex,
@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
+from utils.serializers import SparseFieldsMixin
 from account.models import Team
 
 
-class SignupSerializer(serializers.ModelSerializer):
+class SignupSerializer(serializers.Serializer):
     """Signup functionality serializer.
     
     Middle name field is optional.
@@ -19,19 +20,19 @@ class SignupSerializer(serializers.ModelSerializer):
     )
 
 
-class LoginSerializer(serializers.ModelSerializer):
+class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField(max_length=255)
     password = serializers.CharField(max_length=128)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
         fields = ('uid', 'email', 'first_name', 'middle_name', 'last_name')
         read_only_fields = ('uid', 'email')
 
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Team
         fields = ('code', 'name', 'description', 'mate1', 'mate2', 'created')
@@ -1,3 +1,319 @@
+from datetime import timedelta
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
 
-# Create your tests here.
+from account.models import User, Team
+from tournament.models import Tournament, Place
+from utils.testing import (
+    QueryBudgetTestCase, async_get, create_teams, create_tournament,
+    create_user, get_client, get_uid,
+)
+
+
+def get_organizer(tournament: Tournament) -> User:
+    return User.objects.get(pk=tournament.organizer_id)
+
+
+def get_team(tournament: Tournament) -> Team:
+    return (
+        Team.objects
+        .select_related('mate1')
+        .filter(tournaments=tournament)
+        .first()
+    )
+
+
+def create_places(tournament: Tournament) -> Team:
+    """Place the team of the tournament in the other tournaments."""
+    team = get_team(tournament)
+
+    Place.objects.bulk_create(
+        Place(tournament=other, user=team.mate1, team=team, place='1')
+        for other in Tournament.objects.exclude(pk=tournament.pk)[:10]
+    )
+    return team
+
+
+class UserQueryBudgetTestCase(QueryBudgetTestCase):
+    def check_places(self, response, team: Team):
+        places = Place.objects.filter(user=team.mate1_id).count()
+
+        self.assertEqual(
+            [place['team']['code'] for place in response.json()['results']],
+            [team.pk] * min(places, 10),
+        )
+
+    def test_signup(self):
+        def check(response, tournament: Tournament):
+            self.assertEqual(
+                response.json()['email'], f'{tournament.pk}@example.com',
+            )
+
+        self.assertQueryBudget(4, lambda tournament: get_client().post(
+            '/api/signup/', {
+                'email': f'{tournament.pk}@example.com',
+                'password': 'Passw0rd!x',
+                'first_name': 'first', 'last_name': 'last',
+            }, format='json',
+        ), status_code=201, check=check)
+
+    def test_login(self):
+        def check(response, user: User):
+            self.assertEqual(
+                response.json()['token'], Token.objects.get(user=user).key,
+            )
+
+        self.assertQueryBudget(5, lambda user: get_client().post(
+            '/api/login/', {'email': user.email, 'password': 'password'},
+            format='json',
+        ), prepare=lambda tournament: create_user(password='password'),
+            check=check)
+
+    def test_logout(self):
+        def check(response, token: Token):
+            self.assertFalse(Token.objects.filter(user=token.user).exists())
+
+        self.assertQueryBudget(
+            2, lambda token: get_client(token.user).post('/api/logout/'),
+            prepare=lambda tournament: Token.objects.create(
+                user=create_user(),
+            ), check=check,
+        )
+
+    def test_list(self):
+        self.assertQueryBudget(
+            1, lambda tournament: get_client().get('/api/accounts/'),
+        )
+
+    def test_retrieve(self):
+        def check(response, tournament: Tournament):
+            self.assertEqual(response.json()['uid'], tournament.organizer_id)
+
+        self.assertQueryBudget(1, lambda tournament: get_client().get(
+            f'/api/accounts/{tournament.organizer_id}/',
+        ), check=check)
+
+    def test_retrieve_me(self):
+        # Authenticated user is serialized as is
+        def check(response, user: User):
+            self.assertEqual(response.json()['email'], user.email)
+
+        self.assertQueryBudget(
+            0, lambda user: get_client(user).get('/api/accounts/me/'),
+            prepare=get_organizer, check=check,
+        )
+
+    def test_update(self):
+        def check(response, user: User):
+            user.refresh_from_db()
+
+            self.assertEqual(response.json()['first_name'], 'changed')
+            self.assertEqual(user.first_name, 'changed')
+
+        self.assertQueryBudget(3, lambda user: get_client(user).patch(
+            f'/api/accounts/{user.pk}/', {'first_name': 'changed'},
+            format='json',
+        ), prepare=get_organizer, check=check)
+
+    def test_teams(self):
+        def check(response, team: Team):
+            self.assertIn(
+                team.pk, [item['code'] for item in response.json()['results']],
+            )
+
+        self.assertQueryBudget(3, lambda team: get_client().get(
+            f'/api/accounts/{team.mate1_id}/teams/',
+        ), prepare=get_team, check=check)
+
+    def test_tournaments(self):
+        self.assertQueryBudget(2, lambda team: get_client().get(
+            f'/api/accounts/{team.mate1_id}/tournaments/',
+        ), prepare=create_places, check=self.check_places)
+
+    def test_async_tournaments(self):
+        self.assertQueryBudget(2, lambda team: async_get(
+            f'/api/async/accounts/{team.mate1_id}/tournaments/',
+        ), prepare=create_places, check=self.check_places)
+
+
+class TeamQueryBudgetTestCase(QueryBudgetTestCase):
+    def check_code(self, response, team: Team):
+        self.assertEqual(response.json()['code'], team.pk)
+
+    def check_places(self, response, team: Team):
+        self.assertEqual(
+            [place['team'] for place in response.json()['results']],
+            [team.pk] * min(Place.objects.filter(team=team).count(), 10),
+        )
+
+    def test_list(self):
+        self.assertQueryBudget(
+            1, lambda tournament: get_client().get('/api/teams/'),
+        )
+
+    def test_list_codes(self):
+        def check(response, codes: str):
+            self.assertEqual(
+                sorted(team['code'] for team in response.json()),
+                sorted(codes.split(',')),
+            )
+
+        self.assertQueryBudget(
+            1, lambda codes: get_client().get(f'/api/teams/?codes={codes}'),
+            prepare=lambda tournament: ','.join(
+                Team.objects
+                .filter(tournaments=tournament)
+                .values_list('pk', flat=True)[:50]
+            ), check=check,
+        )
+
+    def test_retrieve(self):
+        self.assertQueryBudget(2, lambda team: get_client().get(
+            f'/api/teams/{team.pk}/',
+        ), prepare=get_team, check=self.check_code)
+
+    def test_create(self):
+        # Team is not saved, its mates are
+        def check(response, team: Team):
+            self.assertEqual(
+                Team.objects.get(pk=response.json()['code']).name, team.name,
+            )
+
+        self.assertQueryBudget(5, lambda team: get_client(team.mate1).post(
+            '/api/teams/', {
+                'name': team.name, 'mate1': team.mate1_id,
+                'mate2': team.mate2_id,
+            }, format='json',
+        ), status_code=201, prepare=lambda tournament: Team(
+            name=f'team{get_uid()}', mate1=create_user(),
+            mate2=create_user(),
+        ), check=check)
+
+    def test_update(self):
+        def check(response, team: Team):
+            self.check_code(response, team)
+            self.assertEqual(response.json()['description'], 'changed')
+
+        self.assertQueryBudget(6, lambda team: get_client(team.mate1).patch(
+            f'/api/teams/{team.pk}/', {'description': 'changed'},
+            format='json',
+        ), prepare=get_team, check=check)
+
+    def test_tournaments(self):
+        self.assertQueryBudget(2, lambda team: get_client().get(
+            f'/api/teams/{team.pk}/tournaments/',
+        ), prepare=create_places, check=self.check_places)
+
+    def test_async_tournaments(self):
+        self.assertQueryBudget(2, lambda team: async_get(
+            f'/api/async/teams/{team.pk}/tournaments/',
+        ), prepare=create_places, check=self.check_places)
+
+
+class PlacesCursorTestCase(TestCase):
+    """Places lists are walked by the cursor, the latest place first."""
+
+    def setUp(self):
+        self.team = create_teams(1)[0]
+        places = Place.objects.bulk_create(
+            Place(
+                tournament=create_tournament(0, activate=False),
+                user=self.team.mate1, team=self.team, place='1',
+            ) for _index in range(8)
+        )
+
+        # Places of the same date, ordered by the primary key, span pages
+        now = timezone.now()
+        for index, place in enumerate(places):
+            Place.objects.filter(pk=place.pk).update(
+                created=now - timedelta(days=index // 4),
+            )
+
+        self.codes = list(
+            Place.objects
+            .filter(team=self.team)
+            .order_by('-created', '-pk')
+            .values_list('tournament_id', flat=True)
+        )
+
+    def walk(self, url: str, link: str) -> list[list[str]]:
+        pages = []
+        while url:
+            data = get_client().get(url).json()
+            pages.append([
+                row['tournament']['code'] for row in data['results']
+            ])
+            url = data[link]
+
+        return pages
+
+    def assertWalked(self, path: str) -> None:
+        url = f'{path}?page_size=3&fields=tournament.code'
+
+        pages = self.walk(url, 'next')
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        self.assertEqual(sum(pages, []), self.codes)
+
+        data = get_client().get(url).json()
+        while data['next']:
+            last = data['next']
+            data = get_client().get(last).json()
+
+        # Backward walk starts at the last page, it is not repeated
+        pages = self.walk(data['previous'], 'previous')
+        self.assertEqual(sum(reversed(pages), []), self.codes[:6])
+
+    def test_user_places(self):
+        self.assertWalked(f'/api/accounts/{self.team.mate1_id}/tournaments/')
+
+    def test_team_places(self):
+        self.assertWalked(f'/api/teams/{self.team.pk}/tournaments/')
+
+    def test_ordering_index(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        for lookup, index in (
+            ({'user_id': self.team.mate1_id}, 'place_user_created_idx'),
+            ({'team_id': self.team.pk}, 'place_team_created_idx'),
+        ):
+            with self.subTest(index=index):
+                plan = (
+                    Place.objects
+                    .filter(**lookup)
+                    .order_by('-created', '-pk')
+                    .explain()
+                )
+                self.assertIn(index, plan)
+
+
+class VersionedModelTestCase(TestCase):
+    def test_concurrent_saves_get_distinct_versions(self):
+        team = create_teams(1)[0]
+        first = Team.objects.get(pk=team.pk)
+        second = Team.objects.get(pk=team.pk)
+
+        first.description = 'first'
+        first.save()
+        second.description = 'second'
+        second.save(update_fields=['description'])
+
+        self.assertEqual(first.version, team.version + 1)
+        self.assertEqual(second.version, team.version + 2)
+        self.assertEqual(
+            Team.objects.values_list('version', flat=True).get(pk=team.pk),
+            second.version,
+        )
+
+    def test_failed_save_raises_database_error(self):
+        first, second = create_teams(2)
+        version = second.version
+
+        second.name = first.name
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            second.save()
+
+        self.assertEqual(second.version, version)
@@ -16,5 +16,16 @@ urlpatterns = [
             path('logout/', views.Logout.as_view(), name='account-logout'),
     ]),
 
-    path('', include(router.urls))
+    path('', include(router.urls)),
+
+    path(
+        'async/accounts/<str:pk>/tournaments/',
+        views.async_get_user_tournaments,
+        name='async-user-tournaments',
+    ),
+    path(
+        'async/teams/<str:pk>/tournaments/',
+        views.async_get_team_tournaments,
+        name='async-team-tournaments',
+    ),
 ]
@@ -2,6 +2,7 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import authenticate
+from django.http import Http404
 
 from rest_framework import status, mixins
 from rest_framework.response import Response
@@ -14,7 +15,15 @@ from rest_framework.permissions import (
 from rest_framework.authtoken.models import Token
 
 from tournament.serializers import PlaceWithTeamSerializer, PlaceSerializer
-from utils.pagination import PageNumberPagination
+from tournament.models import Place
+from utils.pagination import (
+    PageNumberPagination, KeysetPagination, apaginate,
+)
+from utils.views import (
+    async_read_view, SparseQuerysetMixin, BatchRetrieveMixin,
+)
+from utils.serializers import get_sparse_queryset
+from utils.conditional import version_etag
 
 from account.models import Team
 from account.permissions import (
@@ -112,14 +121,16 @@ class Logout(APIView):
 
 
 class UserViewSet(
+    SparseQuerysetMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     GenericViewSet,
 ):
-    queryset = get_user_model().objects.all()
+    queryset = get_user_model().objects.order_by('pk')
     permission_classes = (IsPersonalOrReadOnlyPermission, AllowAny,)
     serializer_class = serializers.UserSerializer
+    pagination_class = KeysetPagination
 
     def get_object(self):
         if (
@@ -141,11 +152,9 @@ class UserViewSet(
     def get_teams(self, request, *args, **kwargs):
         instance = self.get_object()
 
-        teams = (
-            Team.objects
-            .filter_by_user(instance)
-            .order_by('name')
-            .prefetch_related('mate1', 'mate2')
+        teams = get_sparse_queryset(
+            Team.objects.filter_by_user(instance).order_by('name'),
+            self.get_serializer(),
         )
 
         page = self.paginate_queryset(teams)
@@ -160,15 +169,16 @@ class UserViewSet(
         methods=['GET'], detail=True,
         url_name='tournaments', url_path='tournaments',
         serializer_class=PlaceWithTeamSerializer,
-        pagination_class=PageNumberPagination,
     )
     def get_tournaments(self, request, *args, **kwargs):
+        """Places of the user tournaments, the latest place first."""
         instance = self.get_object()
 
-        queryset = (
-            instance.places.all()
-            .prefetch_related('tournament', 'team')
-            .order_by('tournament__status')
+        queryset = get_sparse_queryset(
+            Place.objects
+            .filter(user=instance)
+            .order_by('-created', '-pk'),
+            self.get_serializer(),
         )
 
         page = self.paginate_queryset(queryset)
@@ -181,6 +191,8 @@ class UserViewSet(
 
 
 class TeamViewSet(
+    BatchRetrieveMixin,
+    SparseQuerysetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -197,7 +209,7 @@ class TeamViewSet(
         IsAuthenticatedOrReadOnly,
         IsTeamMateOrReadOnlyPermission,
     )
-    pagination_class = PageNumberPagination
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -205,18 +217,24 @@ class TeamViewSet(
 
         return super().get_serializer_class()
 
+    @version_etag(Team, 'version', 'mate1__version', 'mate2__version')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(
         methods=['GET'], detail=True,
         url_name='tournaments', url_path='tournaments',
         serializer_class=PlaceSerializer,
     )
     def get_tournaments(self, request, *args, **kwargs):
+        """Places of the team tournaments, the latest place first."""
         instance = self.get_object()
 
-        queryset = (
-            instance.places.all()
-            .select_related('tournament')
-            .order_by('tournament__status')
+        queryset = get_sparse_queryset(
+            Place.objects
+            .filter(team=instance)
+            .order_by('-created', '-pk'),
+            self.get_serializer(),
         )
 
         page = self.paginate_queryset(queryset)
@@ -225,4 +243,36 @@ class TeamViewSet(
             return self.get_paginated_response(serializer.data)
 
         serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+
+@async_read_view
+async def async_get_user_tournaments(request, pk):
+    """Places of the user tournaments, the latest place first."""
+    if not await get_user_model().objects.filter(pk=pk).aexists():
+        raise Http404
+
+    return await apaginate(
+        request,
+        Place.objects
+        .filter(user_id=pk)
+        .select_related('tournament', 'team')
+        .order_by('-created', '-pk'),
+        PlaceWithTeamSerializer, KeysetPagination,
+    )
+
+
+@async_read_view
+async def async_get_team_tournaments(request, pk):
+    """Places of the team tournaments, the latest place first."""
+    if not await Team.objects.filter(pk=pk).aexists():
+        raise Http404
+
+    return await apaginate(
+        request,
+        Place.objects
+        .filter(team_id=pk)
+        .select_related('tournament')
+        .order_by('-created', '-pk'),
+        PlaceSerializer, KeysetPagination,
+    )
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+if settings.BRACKET_SNAPSHOT_WARMUP:
+    from tournament.snapshots import warm_bracket_snapshots
+
+    warm_bracket_snapshots()
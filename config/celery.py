@@ -1,9 +1,9 @@
-# import os
-# from celery import Celery
+import os
+from celery import Celery
 
-# os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
-# app = Celery("config")
-# app.config_from_object("django.conf:settings", namespace="CELERY")
+app = Celery("config")
+app.config_from_object("django.conf:settings", namespace="CELERY")
 
-# app.autodiscover_tasks()
+app.autodiscover_tasks()
@@ -51,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'utils.metrics.MetricsMiddleware',
+    'utils.queries.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,6 +60,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'utils.profiling.ProfilingMiddleware',
 
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
@@ -176,7 +179,111 @@ INTERNAL_IPS = [
 
 
 # Celery settings
-# # Url
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html
 
-# CELERY_BROKER_URL = os.environ.get("CELERY_BROKER", "redis://127.0.0.1:6379/0")
-# CELERY_RESULT_BACKEND = os.environ.get("CELERY_BACKEND", "redis://127.0.0.1:6379/0")
+CELERY_BROKER_URL = os.environ.get("CELERY_BROKER", "memory://")
+CELERY_TASK_IGNORE_RESULT = True
+
+# Tasks are executed in place, if there is no broker to send them
+CELERY_TASK_ALWAYS_EAGER = os.environ.get(
+    "CELERY_TASK_ALWAYS_EAGER", str("CELERY_BROKER" not in os.environ),
+) == 'True'
+
+
+# Tournament bracket shapes cache
+
+BRACKET_CACHE_SIZE = int(os.environ.get('BRACKET_CACHE_SIZE', 256))
+BRACKET_CACHE_WARMUP = [*range(4, 17), 32, 64, 128, 256, 512, 1024, 2048, 4096]
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+# Tournament bracket snapshots of the matches endpoint, snapshots are
+# invalidated on change, timeout only limits the stale one lifetime
+
+BRACKET_SNAPSHOT_TIMEOUT = int(os.environ.get('BRACKET_SNAPSHOT_TIMEOUT', 3600))
+BRACKET_SNAPSHOT_WARMUP = os.environ.get('BRACKET_SNAPSHOT_WARMUP', 'False') == 'True'
+
+# Brackets of more matches are not cached, they are streamed from the
+# database by chunks of STREAM_CHUNK_SIZE rows
+
+BRACKET_SNAPSHOT_MAX_MATCHES = int(os.environ.get('BRACKET_SNAPSHOT_MAX_MATCHES', 1023))
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 500))
+
+# Publish/subscribe broker of the live bracket streams, LocalBroker serves
+# the single process deployment, utils.pubsub.RedisBroker shares messages
+# between processes (PUBSUB_URL)
+
+PUBSUB_BACKEND = os.environ.get('PUBSUB_BACKEND', 'utils.pubsub.LocalBroker')
+PUBSUB_OPTIONS = (
+    {'url': os.environ['PUBSUB_URL']} if 'PUBSUB_URL' in os.environ else {}
+)
+
+# Server-sent events idle heartbeat and client reconnection delay, seconds
+
+SSE_HEARTBEAT = int(os.environ.get('SSE_HEARTBEAT', 15))
+SSE_RETRY = int(os.environ.get('SSE_RETRY', 3))
+
+# Request metrics of the /metrics endpoint. Server processes flush their
+# metrics to the METRICS_DIR files every METRICS_FLUSH_INTERVAL seconds to
+# be aggregated (the directory is to be emptied on the server start), the
+# endpoint exposes the serving process metrics only without it. Scraper
+# sends the "Bearer METRICS_TOKEN" authorization if the token is set
+
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+METRICS_SIZE_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304,
+)
+
+# SQL instrumentation of the requests: queries slower than
+# SLOW_QUERY_THRESHOLD seconds are logged, the plan of the request slowest
+# one is logged for SLOW_QUERY_EXPLAIN_RATE part of the requests,
+# statements executed over QUERY_DUPLICATES_THRESHOLD times by the request
+# are logged as the N+1 suspects
+
+SLOW_QUERY_THRESHOLD = float(os.environ.get('SLOW_QUERY_THRESHOLD', 0.1))
+SLOW_QUERY_EXPLAIN_RATE = float(os.environ.get('SLOW_QUERY_EXPLAIN_RATE', 0.01))
+QUERY_DUPLICATES_THRESHOLD = int(os.environ.get('QUERY_DUPLICATES_THRESHOLD', 10))
+
+# On-demand profiling of the requests having the X-Profile header of the
+# staff token or sampled by the active profiling rules (admin). Stacks are
+# sampled every PROFILE_INTERVAL seconds and saved to PROFILE_DIR, rules
+# are reloaded every PROFILE_RULES_TTL seconds
+
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.005))
+PROFILE_RULES_TTL = float(os.environ.get('PROFILE_RULES_TTL', 10))
+PROFILE_TOKEN_MAX_AGE = int(os.environ.get('PROFILE_TOKEN_MAX_AGE', 300))
+
+# Baselines of the bench command results, compared across the branches
+
+BENCH_DIR = os.environ.get('BENCH_DIR', os.path.join(BASE_DIR, 'benchmarks'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'utils.queries': {
+            'handlers': ['console'],
+            'level': os.environ.get('QUERY_LOG_LEVEL', 'WARNING'),
+        },
+    },
+}
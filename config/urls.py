@@ -18,6 +18,11 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 
+from utils.metrics import metrics_view
+from utils.profiling import (
+    ProfileTokenView, ProfileListView, ProfileDownloadView,
+)
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -26,6 +31,17 @@ urlpatterns = [
     path('api/', include('match.urls')),
     path('api/', include('tournament.urls')),
 
+    path('metrics', metrics_view, name='metrics'),
+
+    path(
+        'api/profiles/token/', ProfileTokenView.as_view(),
+        name='profile-token',
+    ),
+    path('api/profiles/', ProfileListView.as_view(), name='profile-list'),
+    path(
+        'api/profiles/<str:name>/', ProfileDownloadView.as_view(),
+        name='profile-download',
+    ),
 ]
 
 if settings.DEBUG:
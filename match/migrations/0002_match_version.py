@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('match', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Incremented on every update, used for optimistic lock.', verbose_name='version'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+def fill_sequence(apps, schema_editor):
+    Match = apps.get_model('match', 'Match')
+    Tournament = apps.get_model('tournament', 'Tournament')
+
+    # Existing matches are the first change of their tournaments
+    Tournament.objects.update(version=models.F('version') + 1)
+    Match.objects.update(sequence=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('match', '0002_match_version'),
+        ('tournament', '0007_tournament_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='sequence',
+            field=models.PositiveIntegerField(default=0, help_text='Tournament version of the last match change.', verbose_name='sequence'),
+        ),
+        migrations.RunPython(fill_sequence, migrations.RunPython.noop),
+    ]
@@ -5,9 +5,10 @@ from django.core.exceptions import ValidationError
 
 from account.models import Team
 from utils.utils import get_uuid_hex
+from utils.models import VersionedModel
 
 
-class Match(models.Model):
+class Match(VersionedModel):
     class StatusChoice(models.IntegerChoices):
         SCHEDULED = 0, _('scheduled')
         ONGOING = 1, _('ongoing')
@@ -51,6 +52,15 @@ class Match(models.Model):
 
     finish = models.DateTimeField(_('finish date'), null=True, default=None)
 
+    version = models.PositiveIntegerField(
+        _('version'), default=0,
+        help_text=_('Incremented on every update, used for optimistic lock.'),
+    )
+    sequence = models.PositiveIntegerField(
+        _('sequence'), default=0,
+        help_text=_('Tournament version of the last match change.'),
+    )
+
     class Meta:
         verbose_name = _('match')
         verbose_name_plural = _('matches')
@@ -10,5 +10,5 @@ class IsMatchOrganizerOrReadOnlyPermission(BasePermission):
             request.user
             and request.user.is_authenticated
             and obj.status not in [2, 3]
-            and obj.round.tournament.organizer == request.user
+            and obj.round.tournament.organizer_id == request.user.pk
         )
@@ -1,17 +1,36 @@
 from rest_framework import serializers
+from django.utils.translation import gettext_lazy as _
 
+from utils.serializers import SparseFieldsMixin
 from account.serializers import TeamSerializer
 from match.models import Match
 
 
 class UpdateMatchSerializer(serializers.ModelSerializer):
+    score1 = serializers.IntegerField(min_value=0)
+    score2 = serializers.IntegerField(min_value=0)
+    version = serializers.IntegerField(
+        min_value=0, required=False,
+        help_text=_('Expected match version, the current one by default.'),
+    )
+
     class Meta:
         model = Match
-        fields = ('code', 'status', 'score1', 'score2')
-        read_only_fields = ('code',)
+        fields = ('code', 'status', 'score1', 'score2', 'version')
+        read_only_fields = ('code', 'status')
+
+    def validate(self, attrs):
+        if attrs['score1'] == attrs['score2']:
+            raise serializers.ValidationError(
+                _('Match scores can not be equals.'),
+            )
+
+        return attrs
 
 
-class MatchWithParticipantSerializer(serializers.ModelSerializer):
+class MatchWithParticipantSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer,
+):
     participant1 = TeamSerializer()
     participant2 = TeamSerializer()
     status = serializers.CharField(source='get_status_display')
@@ -25,3 +44,16 @@ class MatchWithParticipantSerializer(serializers.ModelSerializer):
         )
         read_only_fields = fields
 
+
+class MatchResultSerializer(serializers.Serializer):
+    match = serializers.CharField(max_length=32)
+    score1 = serializers.IntegerField(min_value=0)
+    score2 = serializers.IntegerField(min_value=0)
+
+    def validate(self, attrs):
+        if attrs['score1'] == attrs['score2']:
+            raise serializers.ValidationError(
+                _('Match scores can not be equals.'),
+            )
+
+        return attrs
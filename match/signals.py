@@ -2,60 +2,38 @@ from django.dispatch import receiver
 from django.db.models import signals
 
 from match.models import Match
-from tournament.models import Place
+from tournament.advancement import settle_match
+
+
+@receiver(
+    signal=signals.pre_save, sender=Match,
+    dispatch_uid='remember_match_stored_status',
+)
+def remember_match_stored_status(instance, **kwargs):
+    """Saved match is settled only if the save finishes it."""
+    instance._stored_status = None if instance._state.adding else (
+        Match.objects
+        .filter(pk=instance.pk)
+        .values_list('status', flat=True)
+        .first()
+    )
 
 
 @receiver(
     signal=signals.post_save, sender=Match,
     dispatch_uid='direct_winner_and_loser_on_match_finish',
 )
-def direct_winner_and_loser_on_match_finish(instance, created, **kwargs):
-    if created:
+def direct_winner_and_loser_on_match_finish(
+    instance, created, update_fields, **kwargs,
+):
+    if created or instance.status != Match.StatusChoice.FINISHED:
         return []
 
-    if instance.status == Match.StatusChoice.FINISHED:
-        winner, loser = instance.winner_loser
-        tournament = instance.round.tournament
-        next_match = instance.round.next_match
-
-        if next_match is None:
-            places = []
-
-            for mate in winner.mates:
-                places.append(Place(
-                    tournament=tournament, team=winner,
-                    user=mate, place='1'
-                ))
-
-            for mate in loser.mates:
-                places.append(Place(
-                    tournament=tournament, team=loser,
-                    user=mate, place='2'
-                ))
-
-            return Place.objects.bulk_create(places)
-
-        # Get next match childs
-        # Get winners and save them as participants
-        childs = next_match.childs.all()
-
-        participant1, _ = childs[0].match.winner_loser
-        participant2, _ = childs[1].match.winner_loser
-
-        next_match.participant1 = participant1
-        next_match.participant2 = participant2
-
-        next_match.save()
+    if update_fields is not None and 'status' not in update_fields:
+        return []
 
-        # loser append to Places
-        round = instance.round
-        if next_match.status == Match.StatusChoice.WALK_OVER:
-            round += 1
+    # Finished match is settled already, e.g. its score is fixed by admin
+    if instance._stored_status == Match.StatusChoice.FINISHED:
+        return []
 
-        place = tournament.get_place_by_round_lose(round)
-        return Place.objects.bulk_create(
-            Place(
-                tournament=tournament, team=loser,
-                user=mate, place=place,
-            ) for mate in loser.mates
-        )
+    return settle_match(instance)
@@ -1,3 +1,287 @@
-from django.test import TestCase
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from django.db import connection
+from django.db.models import F
+from django.test import (
+    TestCase, TransactionTestCase, skipUnlessDBFeature,
+)
+from rest_framework import status
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from account.models import User, Team
+from match.models import Match
+from tournament.models import Tournament, Place
+from utils.testing import (
+    QueryBudgetTestCase, async_get, create_tournament, get_client,
+    get_organizer_client, get_ready_matches,
+)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentMatchUpdateTestCase(TransactionTestCase):
+    """
+    Whole bracket is played by the concurrent match updates.
+
+    Notes:
+        Needs the database with row level locks (PostgreSQL, MySQL), SQLite
+        locks the whole database on write.
+    """
+
+    teams_count = 16
+    workers = 8
+
+    def setUp(self):
+        users = [
+            User.objects.create_user(email=f'user{index}@example.com')
+            for index in range(self.teams_count * 2)
+        ]
+        teams = [
+            Team.objects.create(
+                name=f'team{index}',
+                mate1=users[index * 2], mate2=users[index * 2 + 1],
+            ) for index in range(self.teams_count)
+        ]
+
+        self.organizer = users[0]
+        self.tournament = Tournament.objects.create(
+            name='tournament', description='description',
+            organizer=self.organizer, limit=self.teams_count,
+        )
+        self.tournament.teams.add(*teams)
+        self.tournament.activate()
+
+    def get_ready_matches(self) -> list[str]:
+        return list(
+            Match.objects
+            .filter(
+                round__tournament=self.tournament,
+                status=Match.StatusChoice.SCHEDULED,
+                participant1__isnull=False, participant2__isnull=False,
+            )
+            .values_list('code', flat=True)
+        )
+
+    def update_match(self, code: str) -> int:
+        client = APIClient()
+        client.force_authenticate(self.organizer)
+
+        try:
+            response = client.put(
+                f'/api/matches/{code}/',
+                {'score1': random.randint(0, 4), 'score2': 5},
+                format='json',
+            )
+        finally:
+            connection.close()
+
+        return response.status_code
+
+    def test_concurrent_updates_play_whole_bracket(self):
+        finished = []
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while codes := self.get_ready_matches():
+                # Every match is updated twice to race with itself as well
+                statuses = list(executor.map(self.update_match, codes * 2))
+
+                for code, first, second in zip(
+                    codes, statuses[:len(codes)], statuses[len(codes):],
+                ):
+                    # Late update is rejected by the version check or by the
+                    # finished match permission
+                    self.assertIn(status.HTTP_200_OK, (first, second), code)
+                    self.assertIn(
+                        first + second - status.HTTP_200_OK,
+                        (status.HTTP_403_FORBIDDEN, status.HTTP_409_CONFLICT),
+                        code,
+                    )
+                    finished.append(code)
+
+        self.tournament.refresh_from_db()
+
+        self.assertEqual(
+            self.tournament.status, Tournament.StatusChoice.FINISHED,
+        )
+        self.assertEqual(len(finished), self.teams_count - 1)
+        self.assertEqual(
+            Place.objects.filter(tournament=self.tournament).count(),
+            self.teams_count * 2,
+        )
+
+
+class MatchRequest(NamedTuple):
+    """Client and the match of the budgeted request."""
+    client: APIClient
+    match: Match
+
+
+def get_update_request(tournament: Tournament) -> MatchRequest:
+    return MatchRequest(
+        get_organizer_client(tournament), get_ready_matches(tournament)[0],
+    )
+
+
+def play_to_final(tournament: Tournament) -> MatchRequest:
+    """Finish every match of the tournament but the final one."""
+    client = get_organizer_client(tournament)
+    final = Match.objects.get(
+        round__tournament=tournament, round__next_match__isnull=True,
+    )
+
+    while matches := [
+        match for match in get_ready_matches(tournament)
+        if match.pk != final.pk
+    ]:
+        for match in matches:
+            client.put(
+                f'/api/matches/{match.pk}/', {'score1': 1, 'score2': 2},
+                format='json',
+            )
+
+    return MatchRequest(client, final)
+
+
+class MatchQueryBudgetTestCase(QueryBudgetTestCase):
+    def check_code(self, response, match: Match):
+        self.assertEqual(response.json()['code'], match.pk)
+
+    def check_update(self, response, prepared: MatchRequest):
+        prepared.match.refresh_from_db()
+
+        self.assertEqual(response.json(), {
+            'code': prepared.match.pk, 'status': Match.StatusChoice.FINISHED,
+            'score1': 1, 'score2': 2, 'version': prepared.match.version,
+        })
+
+    def test_list_codes(self):
+        def check(response, codes: str):
+            self.assertEqual(
+                sorted(match['code'] for match in response.json()),
+                sorted(codes.split(',')),
+            )
+
+        self.assertQueryBudget(
+            1, lambda codes: get_client().get(f'/api/matches/?codes={codes}'),
+            prepare=lambda tournament: ','.join(
+                match.pk for match in get_ready_matches(tournament)
+            ), check=check,
+        )
+
+    def test_retrieve(self):
+        self.assertQueryBudget(2, lambda match: get_client().get(
+            f'/api/matches/{match.pk}/',
+        ), prepare=lambda tournament: get_ready_matches(tournament)[0],
+            check=self.check_code)
+
+    def test_async_retrieve(self):
+        self.assertQueryBudget(1, lambda match: async_get(
+            f'/api/async/matches/{match.pk}/',
+        ), prepare=lambda tournament: get_ready_matches(tournament)[0],
+            check=self.check_code)
+
+    def test_update(self):
+        # Match, winner and loser, the next match and the loser places
+        self.assertQueryBudget(15, lambda prepared: prepared.client.put(
+            f'/api/matches/{prepared.match.pk}/', {'score1': 1, 'score2': 2},
+            format='json',
+        ), prepare=get_update_request, check=self.check_update)
+
+    def test_update_final(self):
+        # Tournament is finished by the signal and the both teams placed
+        self.assertQueryBudget(14, lambda prepared: prepared.client.put(
+            f'/api/matches/{prepared.match.pk}/', {'score1': 1, 'score2': 2},
+            format='json',
+        ), prepare=play_to_final, check=self.check_update)
+        self.assertEqual(
+            Tournament.objects
+            .filter(status=Tournament.StatusChoice.FINISHED)
+            .count(),
+            len(self.sizes),
+        )
+
+
+class MatchETagTestCase(TestCase):
+    def test_saved_match_changes_etag(self):
+        match = get_ready_matches(create_tournament(4))[0]
+        client = get_client()
+
+        etag = client.get(f'/api/matches/{match.pk}/')['ETag']
+
+        match.score1 = 1
+        match.save()
+
+        response = client.get(
+            f'/api/matches/{match.pk}/', HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class MatchVersionConflictTestCase(TestCase):
+    """Update of the stale match version is rejected on any database."""
+
+    def get_rows(self, tournament: Tournament) -> tuple:
+        return (
+            list(
+                Match.objects
+                .filter(round__tournament=tournament)
+                .order_by('pk')
+                .values()
+            ),
+            list(Place.objects.filter(tournament=tournament).values()),
+            Tournament.objects.values().get(pk=tournament.pk),
+        )
+
+    def test_stale_version_conflicts(self):
+        tournament = create_tournament(4)
+        match = get_ready_matches(tournament)[0]
+
+        # Match is changed by another request after it was read
+        Match.objects.filter(pk=match.pk).update(version=F('version') + 1)
+        rows = self.get_rows(tournament)
+
+        response = get_organizer_client(tournament).put(
+            f'/api/matches/{match.pk}/',
+            {'score1': 1, 'score2': 2, 'version': match.version},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.get_rows(tournament), rows)
+
+
+class MatchSaveTestCase(TestCase):
+    """Match saved out of the API, e.g. by admin, is settled once."""
+
+    def setUp(self):
+        self.tournament = create_tournament(4)
+        self.match = get_ready_matches(self.tournament)[0]
+
+    def get_places(self) -> list:
+        return list(
+            Place.objects
+            .filter(tournament=self.tournament)
+            .values_list('team_id', 'place')
+        )
+
+    def test_finishing_save_settles_match(self):
+        self.match.score1, self.match.score2 = 1, 2
+        self.match.status = Match.StatusChoice.FINISHED
+        self.match.save()
+
+        self.assertEqual(len(self.get_places()), 2)
+
+    def test_finished_match_save_does_not_settle_it_again(self):
+        get_organizer_client(self.tournament).put(
+            f'/api/matches/{self.match.pk}/', {'score1': 1, 'score2': 2},
+            format='json',
+        )
+        places = self.get_places()
+
+        match = Match.objects.get(pk=self.match.pk)
+        match.score1 = 0
+        match.save()
+
+        self.assertEqual(self.get_places(), places)
+        self.assertEqual(len(places), 2)
@@ -10,4 +10,9 @@ router.register('matches', views.MatchViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+
+    path(
+        'async/matches/<str:pk>/', views.async_retrieve_match,
+        name='async-match-detail',
+    ),
 ]
@@ -1,20 +1,30 @@
-from django.http import QueryDict
-from rest_framework import mixins
+from django.db import transaction
+from django.http import Http404
+from rest_framework import status, mixins
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.permissions import (
     IsAuthenticatedOrReadOnly,
 )
 from django.utils.translation import gettext_lazy as _
+from django.core.exceptions import ValidationError
 
+from utils.conditional import version_etag
+from utils.views import (
+    async_read_view, SparseQuerysetMixin, BatchRetrieveMixin,
+)
 from match.models import Match
 from match.permissions import IsMatchOrganizerOrReadOnlyPermission
 from match.serializers import (
     MatchWithParticipantSerializer,
     UpdateMatchSerializer,
 )
+from tournament.advancement import finish_match, MatchVersionConflict
 
 
 class MatchViewSet(
+    BatchRetrieveMixin,
+    SparseQuerysetMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     GenericViewSet,
@@ -36,9 +46,42 @@ class MatchViewSet(
 
         return super().get_serializer_class()
 
+    @version_etag(
+        Match, 'version', 'participant1__version', 'participant2__version',
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @transaction.atomic
     def update(self, request, *args, **kwargs):
-        if isinstance(request.data, QueryDict):
-            request.data._mutable = True
-        request.data['status'] = Match.StatusChoice.FINISHED
+        instance = self.get_object()
+
+        serializer = self.get_serializer(instance, data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            finish_match(instance, **serializer.validated_data)
+        except ValidationError as err:
+            return Response({
+                'details': err,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except MatchVersionConflict:
+            return Response({
+                'details': _('Match has been changed by another request.'),
+            }, status=status.HTTP_409_CONFLICT)
+
+        return Response(self.get_serializer(instance).data)
+
+
+@async_read_view
+async def async_retrieve_match(request, pk):
+    try:
+        instance = await (
+            Match.objects
+            .select_related('participant1', 'participant2')
+            .aget(pk=pk)
+        )
+    except Match.DoesNotExist:
+        raise Http404
 
-        return super().update(request, *args, **kwargs)
+    return MatchWithParticipantSerializer(instance).data
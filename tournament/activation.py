@@ -0,0 +1,175 @@
+import os
+from time import perf_counter
+from itertools import groupby
+from typing import NamedTuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from match.models import Match
+from tournament.bracket import Bracket, get_bracket
+from tournament.models import Tournament, Round, BracketJob
+from tournament.tasks import get_bracket_rows
+from tournament.snapshots import invalidate_bracket_snapshots
+
+
+class ActivationReport(NamedTuple):
+    activated: list[str]
+    failed: dict[str, str]
+    matches: int
+    seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """Activated tournaments per second."""
+        return len(self.activated) / self.seconds if self.seconds else 0.0
+
+
+def build_brackets(
+    sizes: set[int], processes: Optional[int] = None,
+) -> dict[int, Bracket]:
+    """
+    Build bracket shapes for the given teams counts in the process pool,
+    zero processes means building in the current process (with cache).
+    """
+    if processes == 0 or len(sizes) < 2:
+        return {size: get_bracket(size) for size in sizes}
+
+    sizes = sorted(sizes)
+    with ProcessPoolExecutor(processes or os.cpu_count()) as executor:
+        return dict(zip(sizes, executor.map(Bracket, sizes)))
+
+
+def get_registrations(codes: list[str]) -> dict[str, list[str]]:
+    """Registered team codes by tournament, in the registration order."""
+    registrations = (
+        Tournament.teams.through.objects
+        .filter(tournament_id__in=codes)
+        .order_by('tournament_id', 'pk')
+        .values_list('tournament_id', 'team_id')
+    )
+
+    return {
+        code: [team for _tournament, team in rows]
+        for code, rows in groupby(registrations, key=lambda row: row[0])
+    }
+
+
+def activate_tournaments(
+    queryset: QuerySet, processes: Optional[int] = None,
+    batch_size: int = 100,
+) -> ActivationReport:
+    """
+    Activate the given tournaments and insert their brackets.
+
+    Notes:
+        Bracket shapes depend on the teams count only, so the pool builds
+        one shape per distinct count. Matches and rounds of `batch_size`
+        tournaments are inserted by the single transaction. Tournaments of
+        the batch are locked first, registrations are blocked by the lock,
+        and the tournament which teams changed since the shapes were built
+        is failed.
+
+    Attributes:
+        queryset: tournaments to activate, not opened ones are reported.
+        processes: bracket builder processes count, CPU count by default.
+        batch_size: tournaments count per transaction.
+    """
+    started = perf_counter()
+    failed: dict[str, str] = {}
+    activated: list[str] = []
+    matches_count = 0
+
+    tournaments = {
+        tournament.code: tournament for tournament in queryset.only(
+            'code', 'name', 'status', 'limit', 'teams_total',
+        )
+    }
+
+    teams = get_registrations(list(tournaments))
+
+    for code, tournament in list(tournaments.items()):
+        if tournament.status != Tournament.StatusChoice.OPENED:
+            failed[code] = _('Can to activate only opened tournaments.')
+        elif len(teams.get(code, [])) < 4:
+            failed[code] = _(
+                'Can not to start tournament with less then 4 teams.'
+            )
+        else:
+            continue
+
+        del tournaments[code]
+
+    brackets = build_brackets(
+        {len(teams[code]) for code in tournaments}, processes,
+    )
+
+    codes = list(tournaments)
+    for index in range(0, len(codes), batch_size):
+        with transaction.atomic():
+            # Skip tournaments activated by the concurrent request
+            versions = dict(
+                Tournament.objects
+                .select_for_update()
+                .filter(
+                    pk__in=codes[index:index + batch_size],
+                    status=Tournament.StatusChoice.OPENED,
+                )
+                .values_list('pk', 'version')
+            )
+            for code in set(codes[index:index + batch_size]) - set(versions):
+                failed[code] = _('Can to activate only opened tournaments.')
+
+            # Teams registered or removed since the brackets were built
+            locked_teams = get_registrations(list(versions))
+            batch = []
+
+            for code in versions:
+                if locked_teams.get(code, []) == teams[code]:
+                    batch.append(code)
+                else:
+                    failed[code] = _(
+                        'Tournament teams changed during the activation, '
+                        'try again.'
+                    )
+
+            now = timezone.now()
+            matches, rounds, jobs = [], [], []
+
+            for code in batch:
+                tournament = tournaments[code]
+                bracket = brackets[len(teams[code])]
+
+                tournament.version = versions[code] + 1
+                tournament.status = Tournament.StatusChoice.ACTIVE
+                tournament.start = now
+                tournament.teams_total = bracket.size
+                tournament.place_table = bracket.get_places()
+
+                bracket_matches, bracket_rounds = get_bracket_rows(
+                    tournament, bracket, teams[code],
+                )
+                matches += bracket_matches
+                rounds += bracket_rounds
+                jobs.append(BracketJob(
+                    tournament=tournament, finish=now,
+                    status=BracketJob.StatusChoice.DONE,
+                ))
+
+            Match.objects.bulk_create(matches, batch_size=1000)
+            Round.objects.bulk_create(rounds, batch_size=1000)
+            BracketJob.objects.bulk_create(jobs)
+            Tournament.objects.bulk_update(
+                [tournaments[code] for code in batch],
+                ['status', 'start', 'teams_total', 'place_table', 'version'],
+            )
+            invalidate_bracket_snapshots(batch)
+
+        activated += batch
+        matches_count += len(matches)
+
+    return ActivationReport(
+        activated, failed, matches_count, perf_counter() - started,
+    )
@@ -1,6 +1,8 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils.translation import gettext_lazy as _
 
 from .models import Tournament, Round
+from .activation import activate_tournaments
 
 
 @admin.register(Tournament)
@@ -14,6 +16,7 @@ class TournamentAdmin(admin.ModelAdmin):
     list_filter = ('status',)
     raw_id_fields = ('teams',)
     search_fields = ('name',)
+    actions = ('activate',)
 
     add_fieldsets = (
         (
@@ -23,4 +26,22 @@ class TournamentAdmin(admin.ModelAdmin):
                 "fields": ("name", "description", 'organizer', 'contact', 'limit'),
             },
         ),
-    )
\ No newline at end of file
+    )
+
+    @admin.action(description=_('Activate selected tournaments'))
+    def activate(self, request, queryset):
+        # Web workers do not start the process pools, shapes are cached
+        report = activate_tournaments(queryset, processes=0)
+
+        for code, error in report.failed.items():
+            self.message_user(request, f'{code}: {error}', messages.WARNING)
+
+        self.message_user(request, _(
+            'Activated %(count)d tournaments (%(matches)d matches) in '
+            '%(seconds).2f s, %(throughput).1f tournaments/s.'
+        ) % {
+            'count': len(report.activated),
+            'matches': report.matches,
+            'seconds': report.seconds,
+            'throughput': report.throughput,
+        }, messages.SUCCESS)
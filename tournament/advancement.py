@@ -0,0 +1,273 @@
+from typing import Optional
+from django.db import transaction
+from django.db.models import Case, When, Value, F
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from account.models import Team
+from match.models import Match
+from tournament.models import Tournament, Round, Place
+from tournament.snapshots import invalidate_bracket_snapshots
+from tournament.live import publish_bracket_changes
+
+
+class MatchVersionConflict(Exception):
+    """Match has been changed or finished by the concurrent update."""
+
+
+def get_team_places(
+    tournament: Tournament, team: Optional[Team], place: str,
+) -> list[Place]:
+    if team is None:
+        return []
+
+    return [
+        Place(tournament=tournament, team=team, user_id=user_id, place=place)
+        for user_id in (team.mate1_id, team.mate2_id) if user_id is not None
+    ]
+
+
+def settle_match(match: Match) -> list[Place]:
+    """
+    Direct the finished match winner to the next match and save places of
+    the loser (and the winner for the final match).
+    """
+    round = (
+        Round.objects
+        .select_related(
+            'tournament', 'match__participant1', 'match__participant2',
+        )
+        .get(match=match)
+    )
+
+    return settle_rounds(round.tournament, [round])
+
+
+@transaction.atomic
+def finish_match(
+    match: Match, score1: int, score2: int, version: Optional[int] = None,
+) -> Match:
+    """
+    Finish the match with the given scores and settle it.
+
+    Notes:
+        Match row is updated only if its version is still the expected one,
+        so concurrent updates do not need the table lock. Settlement locks
+        the next match row only.
+
+    Attributes:
+        match: match to finish, its participants must be known.
+        score1: participant-1 score.
+        score2: participant-2 score.
+        version: expected match version, the given instance one by default.
+    """
+    if not (match.participant1_id and match.participant2_id):
+        raise ValidationError(_('Match participants are not known yet.'))
+
+    if version is None:
+        version = match.version
+
+    finish = timezone.now()
+    updated = (
+        Match.objects
+        .filter(
+            pk=match.pk, version=version,
+            status__in=[
+                Match.StatusChoice.SCHEDULED, Match.StatusChoice.ONGOING,
+            ],
+        )
+        .update(
+            score1=score1, score2=score2, finish=finish,
+            status=Match.StatusChoice.FINISHED, version=F('version') + 1,
+        )
+    )
+
+    if not updated:
+        raise MatchVersionConflict
+
+    match.score1, match.score2, match.finish = score1, score2, finish
+    match.status = Match.StatusChoice.FINISHED
+    match.version = version + 1
+
+    settle_match(match)
+
+    return match
+
+
+def settle_rounds(tournament: Tournament, rounds: list[Round]) -> list[Place]:
+    """
+    Settle finished matches of the given tournament rounds with the fixed
+    queries count, independent of the rounds count.
+
+    Notes:
+        Rounds matches participants must be loaded (`select_related`), the
+        winner of the match is written to its own next match slot only, so
+        sibling matches can be settled independently. Walk-over next match
+        winner is known right away and is directed further. The tournament
+        version is incremented last and marks every changed match
+        (`Match.sequence`), so the tournament row is locked for the end of
+        the transaction only and the matches of different rounds are
+        settled concurrently.
+
+    Attributes:
+        tournament: rounds tournament.
+        rounds: rounds of finished matches.
+    """
+    now = timezone.now()
+    places: list[Place] = []
+    changed = {round.match_id for round in rounds}
+    finished = False
+
+    # Next match slot -> team relation of every slot to fill
+    advance: dict[tuple[str, int], Team] = {}
+    losers: list[tuple[Round, Team]] = []
+
+    for round in rounds:
+        winner, loser = round.match.winner_loser
+
+        if round.next_match_id is None:
+            places += get_team_places(tournament, winner, '1')
+            places += get_team_places(tournament, loser, '2')
+
+            tournament.status = Tournament.StatusChoice.FINISHED
+            tournament.finish = now
+            finished = True
+            continue
+
+        if winner is not None:
+            advance[round.next_match_id, round.next_slot] = winner
+        losers.append((round, loser))
+
+    walk_overs: set[str] = set()
+    targets = {match_id: team for (match_id, slot), team in advance.items()}
+
+    while targets:
+        # Next matches are locked till the end of the transaction
+        found = {
+            match_id for match_id, status in (
+                Match.objects
+                .select_for_update()
+                .filter(pk__in=targets)
+                .values_list('pk', 'status')
+            ) if status == Match.StatusChoice.WALK_OVER
+        }
+        walk_overs |= found
+
+        cascade = {}
+        for match_id, next_match_id, next_slot in (
+            Round.objects
+            .filter(match_id__in=found, next_match__isnull=False)
+            .values_list('match_id', 'next_match_id', 'next_slot')
+        ):
+            advance[next_match_id, next_slot] = targets[match_id]
+            cascade[next_match_id] = targets[match_id]
+
+        targets = cascade
+
+    for slot in Round.SlotChoice:
+        assigned = {
+            match_id: team.pk
+            for (match_id, next_slot), team in advance.items()
+            if next_slot == slot
+        }
+
+        if assigned:
+            Match.objects.filter(pk__in=assigned).update(**{
+                f'participant{slot}': Case(*(
+                    When(pk=match_id, then=Value(team_id))
+                    for match_id, team_id in assigned.items()
+                )),
+                'version': F('version') + 1,
+            })
+            changed.update(assigned)
+
+    # Lose before the walk over match is the same as lose at its round
+    round_places: dict[int, str] = {}
+    for round, loser in losers:
+        number = round.number
+        if round.next_match_id in walk_overs:
+            number += 1
+
+        if number not in round_places:
+            round_places[number] = tournament.get_place_by_round_lose(number)
+
+        places += get_team_places(tournament, loser, round_places[number])
+
+    places = Place.objects.bulk_create(places)
+
+    if finished:
+        Tournament.objects.filter(pk=tournament.pk).update(
+            status=tournament.status, finish=tournament.finish,
+        )
+
+    # Changed matches are marked by the new tournament version
+    sequence = tournament.increment_version()
+    Match.objects.filter(pk__in=changed).update(sequence=sequence)
+
+    invalidate_bracket_snapshots([tournament.pk])
+    publish_bracket_changes(tournament)
+
+    return places
+
+
+@transaction.atomic
+def settle_round_results(
+    tournament: Tournament, number: int, results: list[dict],
+) -> list[Place]:
+    """
+    Finish the tournament round matches with the given scores and settle
+    them in the single transaction.
+
+    Attributes:
+        tournament: active tournament.
+        number: round number.
+        results: `match` code, `score1` and `score2` mappings.
+    """
+    if tournament.status != Tournament.StatusChoice.ACTIVE:
+        raise ValidationError(
+            _('Can to submit results of the active tournament only.'),
+        )
+
+    scores = {result['match']: result for result in results}
+
+    rounds = list(
+        Round.objects
+        .filter(tournament=tournament, number=number, match_id__in=scores)
+        .select_related('match__participant1', 'match__participant2')
+        .select_for_update(of=('match',))
+    )
+    found = {round.match_id: round for round in rounds}
+
+    errors = {}
+    for code in scores:
+        round = found.get(code)
+
+        if round is None:
+            errors[code] = _('Match is not found at the %(number)d round.') % {
+                'number': number,
+            }
+        elif round.match.status not in [
+            Match.StatusChoice.SCHEDULED, Match.StatusChoice.ONGOING,
+        ]:
+            errors[code] = _('Match has been already finished.')
+        elif not (round.match.participant1_id and round.match.participant2_id):
+            errors[code] = _('Match participants are not known yet.')
+
+    if errors:
+        raise ValidationError(errors)
+
+    now = timezone.now()
+    for round in rounds:
+        round.match.score1 = scores[round.match_id]['score1']
+        round.match.score2 = scores[round.match_id]['score2']
+        round.match.status = Match.StatusChoice.FINISHED
+        round.match.finish = now
+        round.match.version += 1
+
+    Match.objects.bulk_update(
+        [round.match for round in rounds],
+        ['score1', 'score2', 'status', 'finish', 'version'],
+    )
+
+    return settle_rounds(tournament, rounds)
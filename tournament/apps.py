@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class TournamentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tournament'
+
+    def ready(self):
+        from tournament import signals  # noqa: F401
+        from tournament.bracket import warm_bracket_cache
+
+        warm_bracket_cache(settings.BRACKET_CACHE_WARMUP)
@@ -0,0 +1,219 @@
+from array import array
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, Sequence, TypeVar
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+from match.models import Match
+
+
+T = TypeVar("T")
+
+EMPTY = -1
+
+
+class Bracket:
+    """
+    Tournament bracket shape stored as flat heap-indexed arrays.
+
+    Notes:
+        The slot `0` is the final match, the slot `i` children are the
+        `2 * i + 1` (upper) and `2 * i + 2` (lower) slots, so parent and
+        child links are computed from the slot index and never stored.
+        Unused slots have the `EMPTY` status.
+
+        The result bracket is the same as `generate_bracket` builds: teams
+        range is split by halves (upper half is greater) until a scheduled
+        (two teams) or walk-over (one team) first round match is reached,
+        and a shorter lower half is lifted by the walk-over match. First
+        round walk-over match team is the next match participant as well.
+
+        Bracket keeps team indexes only, so the same instance is the shape
+        of every tournament with the same teams count. Use `get_bracket` to
+        get the shared instance and do not modify it.
+
+    Attributes:
+        size: participant teams count.
+        rounds: rounds count, it is the final match round number.
+        matches: used slots (bracket matches) count.
+        status: `Match.StatusChoice` value or `EMPTY` per slot.
+        round: round number per slot, zero for the unused slots.
+        team1: participant-1 team index or `EMPTY` per slot.
+        team2: participant-2 team index or `EMPTY` per slot.
+    """
+
+    __slots__ = (
+        'size', 'rounds', 'matches',
+        'status', 'round', 'team1', 'team2',
+        '_places',
+    )
+
+    def __init__(self, size: int) -> None:
+        if size < 1:
+            raise ValueError(_('Teams list can not be an empty.'))
+
+        self.size = size
+        self.rounds = self.get_rounds_count(size)
+        self._places = None
+
+        capacity = 2 ** self.rounds - 1
+        self.status = status = array('b', [EMPTY]) * capacity
+        self.round = rounds = array('B', [0]) * capacity
+        self.team1 = team1 = array('i', [EMPTY]) * capacity
+        self.team2 = team2 = array('i', [EMPTY]) * capacity
+
+        # Teams range (first index and length) of every used slot
+        first = array('i', [0]) * capacity
+        length = array('i', [0]) * capacity
+
+        length[0] = size
+        rounds[0] = self.rounds
+
+        scheduled = int(Match.StatusChoice.SCHEDULED)
+        walk_over = int(Match.StatusChoice.WALK_OVER)
+
+        matches = 0
+        for slot in range(capacity):
+            count = length[slot]
+            if count == 0:
+                continue
+
+            matches += 1
+            start = first[slot]
+            number = rounds[slot] - 1  # children round number
+            upper = 2 * slot + 1
+
+            # Range that needs less rounds is lifted by the walk over match
+            if ((count - 1).bit_length() or 1) <= number:
+                status[slot] = walk_over
+                first[upper] = start
+                length[upper] = count
+                rounds[upper] = number
+
+            elif count > 2:
+                status[slot] = scheduled
+                middle = count - count // 2
+
+                first[upper] = start
+                length[upper] = middle
+                rounds[upper] = number
+
+                first[upper + 1] = start + middle
+                length[upper + 1] = count - middle
+                rounds[upper + 1] = number
+
+            elif count == 2:
+                status[slot] = scheduled
+                team1[slot] = start
+                team2[slot] = start + 1
+
+            else:
+                status[slot] = walk_over
+                team1[slot] = start
+
+                # Walk over winner is known, it takes the next match slot
+                if slot % 2:
+                    team1[slot // 2] = start
+                elif slot:
+                    team2[slot // 2 - 1] = start
+
+        self.matches = matches
+
+    def __len__(self) -> int:
+        return self.matches
+
+    @staticmethod
+    def get_rounds_count(size: int) -> int:
+        """Return rounds count of the bracket for the given teams count."""
+        return (size - 1).bit_length() or 1
+
+    @staticmethod
+    def parent(slot: int) -> int:
+        """Return the next match slot, `EMPTY` means the final match."""
+        return (slot - 1) // 2 if slot > 0 else EMPTY
+
+    @staticmethod
+    def children(slot: int) -> tuple[int, int]:
+        return 2 * slot + 1, 2 * slot + 2
+
+    def slots(self) -> Iterator[int]:
+        """Iterate over used slots in the heap order (final match first)."""
+        return (
+            slot for slot, status in enumerate(self.status)
+            if status != EMPTY
+        )
+
+    def get_places(self) -> list[Optional[str]]:
+        """
+        Return places of teams by the lost round number, the list index is
+        the round number minus one and the final round item is the final
+        match loser place. Rounds without losers have None place.
+
+        Notes:
+            Lose before the walk-over match is the same as lose at its round,
+            so the loser shares place with the next round losers. Places are
+            computed once, the copy is returned, since the shared bracket
+            must not be modified by the tournament place table changes.
+        """
+        if self._places is not None:
+            return list(self._places)
+
+        walk_over = Match.StatusChoice.WALK_OVER
+        losers = [0] * self.rounds
+
+        for slot in self.slots():
+            if self.status[slot] == walk_over:
+                continue
+
+            number = self.round[slot]
+            if slot and self.status[self.parent(slot)] == walk_over:
+                number += 1
+
+            losers[number - 1] += 1
+
+        places, place = [None] * self.rounds, 2
+        for index in range(self.rounds - 1, -1, -1):
+            count = losers[index]
+            if count == 0:
+                continue
+
+            places[index] = (
+                f'{place}-{place + count - 1}' if count > 1 else str(place)
+            )
+            place += count
+
+        self._places = places
+        return list(places)
+
+    def project(
+        self, teams: Sequence[T],
+    ) -> Iterator[tuple[int, Optional[T], Optional[T]]]:
+        """
+        Iterate over used slots with their participants from the given
+        teams, the order of teams affects the result bracket.
+        """
+        if len(teams) != self.size:
+            raise ValueError(
+                _('Bracket is built for %(size)d teams, %(count)d given.')
+                % {'size': self.size, 'count': len(teams)}
+            )
+
+        for slot in self.slots():
+            team1, team2 = self.team1[slot], self.team2[slot]
+
+            yield (
+                slot,
+                teams[team1] if team1 != EMPTY else None,
+                teams[team2] if team2 != EMPTY else None,
+            )
+
+
+@lru_cache(maxsize=settings.BRACKET_CACHE_SIZE)
+def get_bracket(size: int) -> Bracket:
+    """Return the process-wide shared bracket for the given teams count."""
+    return Bracket(size)
+
+
+def warm_bracket_cache(sizes: Iterable[int]) -> None:
+    for size in sizes:
+        get_bracket(size)
@@ -0,0 +1,159 @@
+import csv
+import json
+from datetime import datetime
+from typing import Iterator, NamedTuple, Optional
+from django.conf import settings
+from django.db import models
+from django.db.models import QuerySet
+
+from match.models import Match
+from tournament.models import Tournament, Place
+
+
+class Export(NamedTuple):
+    """
+    Exported rows of the model.
+
+    Attributes:
+        model: exported model, rows are ordered by its primary key.
+        columns: output names and `values_list` paths of the columns.
+        date_field: path of the date range filter.
+        status_field: path of the status filter, the status column is
+            output by its label.
+        statuses: choices of the status field.
+    """
+    model: type[models.Model]
+    columns: tuple[tuple[str, str], ...]
+    date_field: str
+    status_field: str
+    statuses: type[models.IntegerChoices]
+
+
+EXPORTS = {
+    'tournaments': Export(
+        Tournament,
+        (
+            ('code', 'code'),
+            ('name', 'name'),
+            ('status', 'status'),
+            ('organizer', 'organizer'),
+            ('limit', 'limit'),
+            ('teams_total', 'teams_total'),
+            ('start', 'start'),
+            ('finish', 'finish'),
+        ),
+        'start', 'status', Tournament.StatusChoice,
+    ),
+    'matches': Export(
+        Match,
+        (
+            ('code', 'code'),
+            ('tournament', 'round__tournament'),
+            ('round', 'round__number'),
+            ('status', 'status'),
+            ('participant1', 'participant1'),
+            ('participant2', 'participant2'),
+            ('score1', 'score1'),
+            ('score2', 'score2'),
+            ('finish', 'finish'),
+        ),
+        'finish', 'status', Match.StatusChoice,
+    ),
+    'places': Export(
+        Place,
+        (
+            ('tournament', 'tournament'),
+            ('tournament_status', 'tournament__status'),
+            ('user', 'user'),
+            ('team', 'team'),
+            ('place', 'place'),
+            ('created', 'created'),
+        ),
+        'created', 'tournament__status', Tournament.StatusChoice,
+    ),
+}
+
+OUTPUTS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def get_export_rows(
+    export: Export, since: Optional[datetime] = None,
+    until: Optional[datetime] = None, status: Optional[int] = None,
+) -> Iterator[tuple]:
+    """
+    Iterate the exported rows tuples by the database cursor chunks.
+
+    Notes:
+        Rows are not loaded as the model instances and are fetched by the
+        server-side cursor where the database supports it, so the export
+        memory does not depend on the rows count.
+
+    Attributes:
+        since: date range start, inclusive.
+        until: date range end, exclusive.
+        status: status value.
+    """
+    queryset: QuerySet = export.model.objects.all()
+
+    if since is not None:
+        queryset = queryset.filter(**{f'{export.date_field}__gte': since})
+    if until is not None:
+        queryset = queryset.filter(**{f'{export.date_field}__lt': until})
+    if status is not None:
+        queryset = queryset.filter(**{export.status_field: status})
+
+    paths = [path for _name, path in export.columns]
+    index = paths.index(export.status_field)
+    labels = {value: str(label) for value, label in export.statuses.choices}
+
+    rows = (
+        queryset
+        .order_by('pk')
+        .values_list(*paths)
+        .iterator(chunk_size=settings.STREAM_CHUNK_SIZE)
+    )
+    for row in rows:
+        yield row[:index] + (labels[row[index]],) + row[index + 1:]
+
+
+class Echo:
+    """File-like object returning the written value, for `csv.writer`."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def render_export(
+    export: Export, rows: Iterator[tuple], output: str,
+    batch_size: int = 100,
+) -> Iterator[str]:
+    """Render rows as NDJSON lines or CSV with the header, by batches."""
+    names = [name for name, _path in export.columns]
+
+    if output == 'csv':
+        writer = csv.writer(Echo())
+        render = writer.writerow
+
+        yield writer.writerow(names)
+    else:
+        def render(row: list) -> str:
+            return json.dumps(
+                dict(zip(names, row)), separators=(',', ':'),
+            ) + '\n'
+
+    batch = []
+    for row in rows:
+        batch.append(render([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in row
+        ]))
+
+        if len(batch) == batch_size:
+            yield ''.join(batch)
+            batch = []
+
+    if batch:
+        yield ''.join(batch)
@@ -0,0 +1,132 @@
+import json
+import asyncio
+from typing import AsyncIterator, Optional
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.core.serializers.json import DjangoJSONEncoder
+
+from utils.pubsub import get_broker
+from tournament.models import Tournament
+from tournament.snapshots import get_bracket_changes
+
+
+def get_bracket_channel(code: str) -> str:
+    return f'tournament:{code}:bracket'
+
+
+def get_bracket_event(changes: dict) -> str:
+    """Server-sent event of the bracket changes, its id is the sequence."""
+    return 'id: {}\nevent: matches\ndata: {}\n\n'.format(
+        changes['sequence'], json.dumps(changes, cls=DjangoJSONEncoder),
+    )
+
+
+def get_event_id(event: str) -> int:
+    return int(event[len('id: '):event.index('\n')])
+
+
+def publish_bracket_changes(tournament: Tournament) -> None:
+    """
+    Publish matches changed by the current tournament version after the
+    commit.
+
+    Notes:
+        The event is serialized once for all the subscribers and only if
+        there is any.
+    """
+    code, sequence = tournament.pk, tournament.version
+
+    def publish():
+        broker = get_broker()
+        channel = get_bracket_channel(code)
+
+        if broker.has_subscribers(channel):
+            changes = get_bracket_changes(tournament, sequence - 1)
+            changes['sequence'] = sequence
+
+            broker.publish(channel, get_bracket_event(changes))
+
+    transaction.on_commit(publish)
+
+
+def publish_tournaments_changes(codes: list[str]) -> None:
+    """
+    Publish matches changed by the current versions of the tournaments
+    after the commit.
+
+    Notes:
+        Versions are read in the transaction, right after the change, and
+        only of the tournaments having subscribers.
+    """
+    broker = get_broker()
+    codes = [
+        code for code in codes
+        if broker.has_subscribers(get_bracket_channel(code))
+    ]
+
+    if not codes:
+        return
+
+    for code, version in (
+        Tournament.objects
+        .filter(pk__in=codes)
+        .values_list('pk', 'version')
+    ):
+        publish_bracket_changes(Tournament(pk=code, version=version))
+
+
+def load_bracket_changes(code: str, since: int) -> dict:
+    return get_bracket_changes(Tournament.objects.get(pk=code), since)
+
+
+async def stream_bracket_events(
+    code: str, since: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream server-sent events of the tournament bracket changes.
+
+    Notes:
+        Channel is subscribed before the missed changes are loaded, so no
+        change is lost in between, repeated ones are skipped by the event
+        id. Comment line is sent on idle to detect the closed connection.
+
+    Attributes:
+        code: tournament code.
+        since: sequence of the last known change, missed changes are sent
+            first if given.
+    """
+    async with get_broker().subscribe(get_bracket_channel(code)) as channel:
+        yield 'retry: {}\n\n'.format(settings.SSE_RETRY * 1000)
+
+        if since is not None:
+            changes = await sync_to_async(load_bracket_changes)(code, since)
+            since = changes['sequence']
+
+            yield get_bracket_event(changes)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    channel.get(), settings.SSE_HEARTBEAT,
+                )
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                continue
+
+            if event is None:
+                # Messages are lost, missed changes are loaded instead
+                changes = await sync_to_async(load_bracket_changes)(
+                    code, since or 0,
+                )
+                since = changes['sequence']
+
+                yield get_bracket_event(changes)
+                continue
+
+            sequence = get_event_id(event)
+            if since is not None and sequence <= since:
+                continue
+
+            since = sequence
+            yield event
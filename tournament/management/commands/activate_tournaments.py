@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+
+from tournament.models import Tournament
+from tournament.activation import activate_tournaments
+
+
+class Command(BaseCommand):
+    help = 'Activate opened tournaments and insert their brackets in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'codes', nargs='*',
+            help='Tournament codes, all opened tournaments by default.',
+        )
+        parser.add_argument(
+            '--name', help='Activate tournaments which name contains it.',
+        )
+        parser.add_argument(
+            '--organizer', help='Activate tournaments of the organizer email.',
+        )
+        parser.add_argument(
+            '--min-teams', type=int, default=0,
+            help='Skip tournaments with less registered teams.',
+        )
+        parser.add_argument(
+            '--processes', type=int, default=None,
+            help='Bracket builder processes, CPU count by default.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Tournaments count inserted by the single transaction.',
+        )
+
+    def handle(
+        self, *args, codes, name, organizer, min_teams, processes,
+        batch_size, **options,
+    ):
+        queryset = Tournament.objects.all()
+
+        if codes:
+            queryset = queryset.filter(code__in=codes)
+        else:
+            queryset = queryset.filter(status=Tournament.StatusChoice.OPENED)
+
+        if name:
+            queryset = queryset.filter(name__icontains=name)
+        if organizer:
+            queryset = queryset.filter(organizer__email=organizer)
+        if min_teams:
+            queryset = queryset.filter(teams_total__gte=min_teams)
+
+        report = activate_tournaments(queryset, processes, batch_size)
+
+        for code, error in report.failed.items():
+            self.stderr.write(f'{code}: {error}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Activated {len(report.activated)} tournaments '
+            f'({report.matches} matches) in {report.seconds:.2f} s, '
+            f'{report.throughput:.1f} tournaments/s, '
+            f'{len(report.failed)} failed.'
+        ))
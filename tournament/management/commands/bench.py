@@ -0,0 +1,361 @@
+import os
+import json
+import platform
+import statistics
+from time import perf_counter
+from typing import Callable, Optional
+import django
+from django.conf import settings
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from account.models import User
+from match.views import MatchViewSet
+from tournament.models import Tournament
+from tournament.tasks import initialize_bracket
+from tournament.bracket import Bracket, get_bracket
+from tournament.generate_bracket import generate_bracket
+from utils.testing import create_teams, create_tournament, get_ready_matches
+
+
+class Command(BaseCommand):
+    """
+    Time the bracket, registration and results hot paths.
+
+    Notes:
+        Every benchmark is run `--warmups` times, then timed `--samples`
+        times, a sample runs the operation `loops` times and its value is
+        the time of one operation. Loops of the in-memory benchmarks are
+        calibrated so the sample takes `--min-time`, the database ones run
+        for every team of the `--teams` sized tournament created before the
+        sample and not timed. Database benchmarks use the test database,
+        it is created and dropped by the command.
+
+        `build_bracket` times the bracket shape built by the activation,
+        `generate_bracket` is the replaced builder kept for the comparison.
+    """
+
+    calibrated = (
+        'build_bracket', 'generate_bracket', 'get_place_by_round_lose',
+        'get_place_by_round_lose_legacy',
+    )
+
+    help = (
+        'Time the bracket, registration and results hot paths, save the '
+        'results as the baseline or compare them with one.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'benchmarks', nargs='*',
+            help='Benchmark names, all of them by default.',
+        )
+        parser.add_argument(
+            '--teams', type=int, default=64,
+            help='Teams count of the benchmarked tournaments.',
+        )
+        parser.add_argument(
+            '--samples', type=int, default=10,
+            help='Timed samples count per benchmark.',
+        )
+        parser.add_argument(
+            '--warmups', type=int, default=1,
+            help='Untimed samples count per benchmark.',
+        )
+        parser.add_argument(
+            '--min-time', type=float, default=0.1,
+            help='Calibrated sample duration, seconds.',
+        )
+        parser.add_argument(
+            '--save', metavar='NAME',
+            help='Save the results as the BENCH_DIR baseline.',
+        )
+        parser.add_argument(
+            '--compare', metavar='NAME',
+            help='Compare the results with the BENCH_DIR baseline.',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=10.0,
+            help='Slowdown percent failing the comparison.',
+        )
+        parser.add_argument(
+            '--json', action='store_true', dest='as_json',
+            help='Write the results JSON instead of the table.',
+        )
+
+    def handle(self, *args, benchmarks: list[str], teams: int, samples: int,
+               warmups: int, min_time: float, save: Optional[str],
+               compare: Optional[str], threshold: float, as_json: bool,
+               **options):
+        available = self.get_benchmarks()
+
+        unknown = set(benchmarks) - set(available)
+        if unknown:
+            raise CommandError(
+                'Unknown benchmarks: {}, available are: {}.'.format(
+                    ', '.join(sorted(unknown)), ', '.join(available),
+                )
+            )
+
+        if teams < 4:
+            raise CommandError('Tournament needs four teams at least.')
+
+        baseline = self.load(compare) if compare else None
+        self.teams = teams
+        self.min_time = min_time
+
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = {
+                name: self.run(name, available[name], samples, warmups)
+                for name in benchmarks or available
+            }
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        report = {'metadata': self.get_metadata(), 'benchmarks': results}
+
+        if save:
+            self.save(save, report)
+
+        if as_json:
+            self.stdout.write(self.dumps(report))
+        elif baseline is None:
+            self.write_results(results)
+
+        if baseline is not None:
+            self.compare(baseline, report, threshold)
+
+    def get_benchmarks(self) -> dict[str, Callable[[int], float]]:
+        """Benchmarks by name, they return the time of the given loops."""
+        return {
+            'build_bracket': self.bench_build_bracket,
+            'generate_bracket': self.bench_generate_bracket,
+            'get_place_by_round_lose': self.bench_get_place_by_round_lose,
+            'get_place_by_round_lose_legacy': (
+                self.bench_get_place_by_round_lose_legacy
+            ),
+            'initialize_bracket': self.bench_initialize_bracket,
+            'append_team': self.bench_append_team,
+            'play_tournament': self.bench_play_tournament,
+        }
+
+    def run(self, name: str, bench: Callable[[int], float], samples: int,
+            warmups: int) -> dict:
+        loops = self.calibrate(bench) if name in self.calibrated else 1
+
+        for _index in range(warmups):
+            bench(loops)
+
+        values = [bench(loops) / loops for _index in range(samples)]
+
+        return {
+            'loops': loops,
+            'values': values,
+            'mean': statistics.mean(values),
+            'stdev': statistics.stdev(values) if len(values) > 1 else 0.0,
+            'min': min(values),
+        }
+
+    def calibrate(self, bench: Callable[[int], float]) -> int:
+        """Double the loops till the sample takes `min_time`."""
+        loops = 1
+        while bench(loops) < self.min_time:
+            loops *= 2
+
+        return loops
+
+    def bench_build_bracket(self, loops: int) -> float:
+        """Not cached bracket shape, `get_bracket` builds it once."""
+        started = perf_counter()
+        for _index in range(loops):
+            Bracket(self.teams)
+
+        return perf_counter() - started
+
+    def bench_generate_bracket(self, loops: int) -> float:
+        teams = list(range(self.teams))
+
+        started = perf_counter()
+        for _index in range(loops):
+            generate_bracket(teams, {})
+
+        return perf_counter() - started
+
+    def bench_get_place_by_round_lose(self, loops: int) -> float:
+        """Places of the activated tournament, read of its place table."""
+        return self.time_places(Tournament(
+            teams_total=self.teams,
+            place_table=get_bracket(self.teams).get_places(),
+        ), loops)
+
+    def bench_get_place_by_round_lose_legacy(self, loops: int) -> float:
+        """Places of the tournaments activated before the place table."""
+        return self.time_places(Tournament(teams_total=self.teams), loops)
+
+    def time_places(self, tournament: Tournament, loops: int) -> float:
+        border = Tournament.get_next_power_of_2(self.teams)
+        rounds = range(1, max(border, 2))
+
+        started = perf_counter()
+        for _index in range(loops):
+            for number in rounds:
+                tournament.get_place_by_round_lose(number)
+
+        return perf_counter() - started
+
+    def bench_initialize_bracket(self, loops: int) -> float:
+        elapsed = 0.0
+
+        for _index in range(loops):
+            tournament = create_tournament(self.teams, activate=False)
+
+            started = perf_counter()
+            initialize_bracket(tournament)
+            elapsed += perf_counter() - started
+
+        return elapsed
+
+    def bench_append_team(self, loops: int) -> float:
+        elapsed = 0.0
+
+        for _index in range(loops):
+            tournament = create_tournament(
+                0, activate=False, limit=self.teams,
+            )
+            teams = create_teams(self.teams)
+
+            # Value is of the one team registration
+            started = perf_counter()
+            for team in teams:
+                tournament.append_team(team)
+            elapsed += perf_counter() - started
+
+        return elapsed / self.teams
+
+    def bench_play_tournament(self, loops: int) -> float:
+        """Finish every match by the `MatchViewSet.update` requests."""
+        view = MatchViewSet.as_view({'put': 'update'})
+        factory = APIRequestFactory()
+        elapsed = 0.0
+
+        for _index in range(loops):
+            tournament = create_tournament(self.teams)
+            organizer = User.objects.get(pk=tournament.organizer_id)
+
+            while matches := get_ready_matches(tournament):
+                started = perf_counter()
+
+                for match in matches:
+                    request = factory.put(
+                        f'/api/matches/{match.pk}/',
+                        {'score1': 1, 'score2': 2}, format='json',
+                    )
+                    force_authenticate(request, organizer)
+
+                    response = view(request, pk=match.pk)
+                    if response.status_code != 200:
+                        raise CommandError(
+                            f'Match update responded with '
+                            f'{response.status_code}: {response.data}.'
+                        )
+
+                elapsed += perf_counter() - started
+
+        return elapsed
+
+    def get_metadata(self) -> dict:
+        return {
+            'date': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'platform': platform.platform(),
+            'database': connection.vendor,
+            'teams': self.teams,
+        }
+
+    @staticmethod
+    def dumps(report: dict) -> str:
+        return json.dumps(report, indent=2)
+
+    @staticmethod
+    def get_path(name: str) -> str:
+        return os.path.join(settings.BENCH_DIR, f'{name}.json')
+
+    def save(self, name: str, report: dict) -> None:
+        os.makedirs(settings.BENCH_DIR, exist_ok=True)
+
+        with open(self.get_path(name), 'w') as stream:
+            stream.write(self.dumps(report))
+
+    def load(self, name: str) -> dict:
+        try:
+            with open(self.get_path(name)) as stream:
+                return json.load(stream)
+        except FileNotFoundError:
+            raise CommandError(f'Baseline "{name}" is not found.')
+
+    def write_results(self, results: dict) -> None:
+        self.stdout.write(
+            f'{"benchmark":<32} {"mean":>12} {"stdev":>12} {"min":>12} '
+            f'{"loops":>7}'
+        )
+
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<32} {self.format_time(result["mean"]):>12} '
+                f'{self.format_time(result["stdev"]):>12} '
+                f'{self.format_time(result["min"]):>12} '
+                f'{result["loops"]:>7}'
+            )
+
+    def compare(self, baseline: dict, report: dict, threshold: float) -> None:
+        """Write the mean time changes, fail on the slowdown over threshold."""
+        if baseline['metadata'].get('teams') != self.teams:
+            self.stderr.write(
+                'Baseline is of {} teams, the results are not comparable.'
+                .format(baseline['metadata'].get('teams')),
+            )
+
+        self.stdout.write(
+            f'{"benchmark":<32} {"baseline":>12} {"current":>12} '
+            f'{"change":>9}'
+        )
+
+        regressions = []
+        for name, result in report['benchmarks'].items():
+            previous = baseline['benchmarks'].get(name)
+            if previous is None:
+                self.stdout.write(
+                    f'{name:<32} {"-":>12} '
+                    f'{self.format_time(result["mean"]):>12}'
+                )
+                continue
+
+            change = (result['mean'] / previous['mean'] - 1) * 100
+            if change > threshold:
+                regressions.append(name)
+
+            self.stdout.write(
+                f'{name:<32} {self.format_time(previous["mean"]):>12} '
+                f'{self.format_time(result["mean"]):>12} {change:>+8.1f}%'
+                + (' slower' if change > threshold else '')
+            )
+
+        if regressions:
+            raise CommandError(
+                'Slower than the baseline by over {}%: {}.'.format(
+                    threshold, ', '.join(regressions),
+                )
+            )
+
+    @staticmethod
+    def format_time(seconds: float) -> str:
+        for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+            if seconds >= scale:
+                return f'{seconds / scale:.3f} {unit}'
+
+        return f'{seconds / 1e-9:.1f} ns'
@@ -0,0 +1,146 @@
+import asyncio
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.test import Client, AsyncClient
+from django.core.management.base import BaseCommand, CommandError
+
+from tournament.models import Tournament, Round
+
+
+class Command(BaseCommand):
+    """
+    Compare the sync and async read endpoints under the concurrent load.
+
+    Notes:
+        Requests are handled in-process by the Django test handlers, not by
+        the servers: sync views by the WSGI handler in `--concurrency`
+        threads, async views by the ASGI handler in as many tasks of one
+        event loop. Results compare the handler and ORM paths of the views,
+        not the server concurrency, the network and the worker processes.
+        The servers (e.g. gunicorn and uvicorn, not in the requirements)
+        are compared by an external load generator.
+    """
+
+    help = (
+        'Compare the sync and async read endpoints throughput under the '
+        'concurrent load. Requests are handled in-process by the WSGI and '
+        'ASGI test handlers, not by the servers, so the results compare '
+        'the views code paths, not the server concurrency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tournament', nargs='?',
+            help='Tournament code, the last started one by default.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Requests count per endpoint.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=16,
+            help='Concurrent clients count.',
+        )
+
+    def handle(self, *args, tournament, requests: int, concurrency: int,
+               **options):
+        paths = self.get_paths(tournament)
+
+        self.stdout.write(
+            f'{"endpoint":<20} {"sync":>10} {"async":>10} {"ratio":>7}'
+        )
+
+        for name, path in paths:
+            sync = self.run_sync(f'/api/{path}', requests, concurrency)
+            async_ = asyncio.run(
+                self.run_async(f'/api/async/{path}', requests, concurrency),
+            )
+
+            self.stdout.write(
+                f'{name:<20} {sync:>6.0f} r/s {async_:>6.0f} r/s '
+                f'{async_ / sync:>6.2f}x'
+            )
+
+    def get_paths(self, code: str) -> list[tuple[str, str]]:
+        queryset = Tournament.objects.exclude(
+            status=Tournament.StatusChoice.OPENED,
+        )
+
+        tournament = (
+            queryset.filter(pk=code) if code else
+            queryset.order_by('-start')
+        ).first()
+
+        if tournament is None:
+            raise CommandError('Active or finished tournament is not found.')
+
+        match = (
+            Round.objects
+            .filter(tournament=tournament)
+            .values_list('match_id', flat=True)
+            .first()
+        )
+        team = tournament.teams.first()
+
+        return [
+            ('tournament list', 'tournaments/'),
+            ('tournament', f'tournaments/{tournament.pk}/'),
+            ('tournament matches', f'tournaments/{tournament.pk}/matches/'),
+            ('match', f'matches/{match}/'),
+            ('team tournaments', f'teams/{team.pk}/tournaments/'),
+            ('user tournaments', f'accounts/{team.mate1_id}/tournaments/'),
+        ]
+
+    @staticmethod
+    def check_status(path: str, status_code: int) -> None:
+        if status_code != 200:
+            raise CommandError(f'{path} responded with {status_code}.')
+
+    def run_sync(self, path: str, requests: int, concurrency: int) -> float:
+        """Return requests per second of the WSGI handler threads."""
+        def work(count: int) -> None:
+            client = Client()
+
+            try:
+                for _index in range(count):
+                    self.check_status(path, client.get(path).status_code)
+            finally:
+                connections.close_all()
+
+        work(1)
+
+        started = perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(work, self.split(requests, concurrency)))
+
+        return requests / (perf_counter() - started)
+
+    async def run_async(
+        self, path: str, requests: int, concurrency: int,
+    ) -> float:
+        """Return requests per second of the ASGI handler tasks."""
+        async def work(count: int) -> None:
+            client = AsyncClient()
+
+            for _index in range(count):
+                response = await client.get(path)
+                self.check_status(path, response.status_code)
+
+        await work(1)
+
+        started = perf_counter()
+        await asyncio.gather(*map(work, self.split(requests, concurrency)))
+        elapsed = perf_counter() - started
+
+        await sync_to_async(connections.close_all)()
+
+        return requests / elapsed
+
+    @staticmethod
+    def split(requests: int, concurrency: int) -> list[int]:
+        return [
+            requests // concurrency + (index < requests % concurrency)
+            for index in range(concurrency)
+        ]
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tournament.exports import EXPORTS, get_export_rows, render_export
+from tournament.serializers import ExportQuerySerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Export tournaments, matches or places rows as NDJSON or CSV in the '
+        'constant memory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(EXPORTS))
+        parser.add_argument(
+            '--output', choices=['ndjson', 'csv'], default='ndjson',
+            help='Output format, NDJSON by default.',
+        )
+        parser.add_argument(
+            '--since', help='Date range start (ISO 8601), inclusive.',
+        )
+        parser.add_argument(
+            '--until', help='Date range end (ISO 8601), exclusive.',
+        )
+        parser.add_argument('--status', help='Status label of the rows.')
+        parser.add_argument(
+            '--file', help='Output file path, standard output by default.',
+        )
+
+    def handle(self, *args, kind, file, **options):
+        export = EXPORTS[kind]
+
+        query = ExportQuerySerializer(
+            data={
+                name: options[name]
+                for name in ('output', 'since', 'until', 'status')
+                if options[name] is not None
+            },
+            context={'export': export},
+        )
+        if not query.is_valid():
+            raise CommandError('; '.join(
+                f'{name}: {" ".join(errors)}'
+                for name, errors in query.errors.items()
+            ))
+
+        output = query.validated_data.pop('output')
+        chunks = render_export(
+            export, get_export_rows(export, **query.validated_data), output,
+        )
+
+        if file is None:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(file, 'w', newline='') as stream:
+            stream.writelines(chunks)
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:02
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tournament',
+            name='limit',
+            field=models.PositiveSmallIntegerField(default=16, validators=[django.core.validators.MinValueValidator(4), django.core.validators.MaxValueValidator(4096)], verbose_name='teams count limit'),
+        ),
+    ]
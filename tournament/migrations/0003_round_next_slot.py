@@ -0,0 +1,32 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+def fill_next_slot(apps, schema_editor):
+    Round = apps.get_model('tournament', 'Round')
+
+    # Winners were directed to the related match by its childs order
+    rounds, childs = [], {}
+    for round in Round.objects.filter(next_match__isnull=False).order_by('id'):
+        childs[round.next_match_id] = childs.get(round.next_match_id, 0) + 1
+        round.next_slot = childs[round.next_match_id]
+        rounds.append(round)
+
+    Round.objects.bulk_update(rounds, ['next_slot'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0002_alter_tournament_limit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='round',
+            name='next_slot',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'participant-1'), (2, 'participant-2')], default=None, help_text='Related match participant taken by the match winner.', null=True, verbose_name='related match slot'),
+        ),
+        migrations.RunPython(fill_next_slot, migrations.RunPython.noop),
+    ]
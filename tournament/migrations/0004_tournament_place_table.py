@@ -0,0 +1,42 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:09
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_teams_total(apps, schema_editor):
+    Tournament = apps.get_model('tournament', 'Tournament')
+
+    Tournament.objects.update(
+        teams_total=Coalesce(
+            models.Subquery(
+                Tournament.teams.through.objects
+                .filter(tournament_id=models.OuterRef('pk'))
+                .values('tournament_id')
+                .annotate(count=models.Count('pk'))
+                .values('count')
+            ),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0003_round_next_slot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='place_table',
+            field=models.JSONField(blank=True, default=list, help_text='Place of the team lost at the round, item index is the round number minus one. Filled on the tournament activation.', verbose_name='places by lost round'),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='teams_total',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Denormalized participant teams count.', verbose_name='participant teams count'),
+        ),
+        migrations.RunPython(fill_teams_total, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_participants(apps, schema_editor):
+    Tournament = apps.get_model('tournament', 'Tournament')
+    Participant = apps.get_model('tournament', 'Participant')
+
+    registrations = (
+        Tournament.teams.through.objects
+        .values_list('tournament_id', 'team_id', 'team__mate1', 'team__mate2')
+        .iterator()
+    )
+
+    Participant.objects.bulk_create(
+        (
+            Participant(tournament_id=tournament, team_id=team, user_id=user)
+            for tournament, team, *users in registrations
+            for user in users if user is not None
+        ),
+        batch_size=1000, ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tournament', '0004_tournament_place_table'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Participant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participations', to='account.team', verbose_name='team')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='tournament.tournament', verbose_name='tournament')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participations', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'tournament participant',
+                'verbose_name_plural': 'tournament participants',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='participant',
+            constraint=models.UniqueConstraint(fields=('tournament', 'user'), name='tournament_user_participates_once'),
+        ),
+        migrations.RunPython(fill_participants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+import utils.utils
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0005_participant'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BracketJob',
+            fields=[
+                ('code', models.CharField(default=utils.utils.get_uuid_hex, max_length=32, primary_key=True, serialize=False, verbose_name='code')),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'pending'), (1, 'running'), (2, 'done'), (3, 'failed')], default=0, verbose_name='status')),
+                ('error', models.TextField(blank=True, default='', verbose_name='error')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='date created')),
+                ('finish', models.DateTimeField(default=None, null=True, verbose_name='finish date')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bracket_jobs', to='tournament.tournament', verbose_name='tournament')),
+            ],
+            options={
+                'verbose_name': 'bracket job',
+                'verbose_name_plural': 'bracket jobs',
+                'ordering': ['-created'],
+            },
+        ),
+    ]
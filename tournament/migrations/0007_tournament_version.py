@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0006_bracketjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Incremented on every update, used for conditional GET.', verbose_name='version'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0007_tournament_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['team', 'tournament'], name='place_team_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['status', '-finish', 'name', 'code'], name='tournament_ordering_idx'),
+        ),
+    ]
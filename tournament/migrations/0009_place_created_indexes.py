@@ -0,0 +1,25 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0008_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='place',
+            name='place_team_idx',
+        ),
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['user', '-created', '-id'], name='place_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['team', '-created', '-id'], name='place_team_created_idx'),
+        ),
+    ]
@@ -1,6 +1,5 @@
-from itertools import chain
-from datetime import datetime
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
@@ -9,11 +8,12 @@ from django.utils.translation import gettext_lazy as _
 from account.models import Team
 from match.models import Match
 from utils.utils import get_uuid_hex
+from utils.models import VersionedModel
 
 from tournament.validators import place_value_validator
 
 
-class Tournament(models.Model):
+class Tournament(VersionedModel):
     class StatusChoice(models.IntegerChoices):
         OPENED = 0, _('opened')
         ACTIVE = 1, _('active')
@@ -42,7 +42,7 @@ class Tournament(models.Model):
 
     limit = models.PositiveSmallIntegerField(
         _('teams count limit'), default=16,
-        validators=[MinValueValidator(4), MaxValueValidator(16),],
+        validators=[MinValueValidator(4), MaxValueValidator(4096),],
     )
 
     teams = models.ManyToManyField(
@@ -52,29 +52,41 @@ class Tournament(models.Model):
     start = models.DateTimeField(_('start date'), null=True, default=None)
     finish = models.DateTimeField(_('finish date'), null=True, default=None)
 
+    teams_total = models.PositiveSmallIntegerField(
+        _('participant teams count'), default=0,
+        help_text=_('Denormalized participant teams count.'),
+    )
+    place_table = models.JSONField(
+        _('places by lost round'), default=list, blank=True,
+        help_text=_(
+            'Place of the team lost at the round, item index is the round '
+            'number minus one. Filled on the tournament activation.',
+        ),
+    )
+
     class Meta:
         verbose_name = _('tournament')
         verbose_name_plural = _('tournaments')
         ordering = ['status', '-finish', 'name']
+        indexes = [
+            # Keyset pagination of the list by its ordering
+            models.Index(
+                fields=['status', '-finish', 'name', 'code'],
+                name='tournament_ordering_idx',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
 
     @staticmethod
-    def get_next_power_of_2(
-        value: int, step: int = 0, _container: int = 1,
-    ) -> int:
+    def get_next_power_of_2(value: int) -> int:
         if value < 1:
             raise ValueError(
                 'Can not to find next power of 2 for negative and zero.',
             )
 
-        if value <= _container:
-            return step
-
-        return Tournament.get_next_power_of_2(
-            value, step + 1, _container * 2,
-        )
+        return (value - 1).bit_length()
 
     @property
     def teams_count(self) -> int:
@@ -82,77 +94,300 @@ class Tournament(models.Model):
 
     @property
     def participant_user_ids(self) -> list[str]:
-        return list(chain(
-            *[[team.mate1_id, team.mate2_id] for team in self.teams.all()]
-        ))
+        return list(self.participants.values_list('user_id', flat=True))
 
     def append_team(self, team: Team) -> None:
+        """
+        Register the team at the tournament.
+
+        Notes:
+            The limit is checked and taken by the single counter update and
+            repeated teams and users are rejected by the unique constraints,
+            so the queries count does not depend on the registered teams
+            count and concurrent registrations can not exceed the limit.
+        """
         if self.status != self.StatusChoice.OPENED:
             raise ValidationError(
                 _('Can not to append new team to the closed tournament.'),
             )
 
-        teams = list[self.teams.all()]
+        with transaction.atomic():
+            taken = (
+                Tournament.objects
+                .filter(
+                    pk=self.pk, status=self.StatusChoice.OPENED,
+                    teams_total__lt=models.F('limit'),
+                )
+                .update(
+                    teams_total=models.F('teams_total') + 1,
+                    version=models.F('version') + 1,
+                )
+            )
 
-        if self.limit - len(teams) < 1:
+            if not taken:
+                raise ValidationError(
+                    _('Tournament teams limit is over.')
+                )
+
+            try:
+                with transaction.atomic():
+                    Tournament.teams.through.objects.create(
+                        tournament_id=self.pk, team_id=team.pk,
+                    )
+                    Participant.objects.bulk_create(
+                        Participant(tournament=self, team=team, user_id=user)
+                        for user in (team.mate1_id, team.mate2_id)
+                        if user is not None
+                    )
+            except IntegrityError:
+                raise self.get_registration_error(team)
+
+        self.teams_total += 1
+
+    def append_teams(
+        self, codes: list[str],
+    ) -> tuple[list[Team], dict[str, str]]:
+        """
+        Register the teams given by codes, the invalid ones are skipped.
+
+        Notes:
+            All teams are validated by the set-based queries and inserted by
+            the single bulk insert, the tournament row is locked to keep the
+            limit. Repeated codes are registered once.
+
+        Returns:
+            Registered teams and errors by the skipped team code.
+        """
+        if self.status != self.StatusChoice.OPENED:
             raise ValidationError(
-                _('Tournament teams limit is over.')
+                _('Can not to append new team to the closed tournament.'),
             )
 
-        if team in teams:
-            raise ValidationError(
-                _('Team already register at this tournament.'),
+        teams = Team.objects.select_related('mate1', 'mate2').in_bulk(codes)
+        users = {
+            user for team in teams.values()
+            for user in (team.mate1_id, team.mate2_id) if user is not None
+        }
+
+        with transaction.atomic():
+            tournament = (
+                Tournament.objects
+                .select_for_update()
+                .only('status', 'limit', 'teams_total')
+                .get(pk=self.pk)
+            )
+
+            if tournament.status != self.StatusChoice.OPENED:
+                raise ValidationError(
+                    _('Can not to append new team to the closed tournament.'),
+                )
+
+            registered = set(
+                Tournament.teams.through.objects
+                .filter(tournament_id=self.pk, team_id__in=teams)
+                .values_list('team_id', flat=True)
+            )
+            participants = set(
+                Participant.objects
+                .filter(tournament_id=self.pk, user_id__in=users)
+                .values_list('user_id', flat=True)
             )
 
-        users = list(chain(*[[_team.mate1, _team.mate2] for _team in teams]))
-        repeated_user = (
-            (team.mate1 if team.mate1_id in users else None)
-            or (team.mate2 if team.mate2 in users else None)
+            accepted, errors = [], {}
+            for code in dict.fromkeys(codes):
+                team = teams.get(code)
+
+                if team is None:
+                    errors[code] = _('Team does not exist.')
+                elif code in registered:
+                    errors[code] = _(
+                        'Team already register at this tournament.'
+                    )
+                elif team.mate1_id in participants:
+                    errors[code] = _(
+                        'The %(user)s is already the tournament participant.'
+                    ) % {'user': team.mate1}
+                elif team.mate2_id in participants:
+                    errors[code] = _(
+                        'The %(user)s is already the tournament participant.'
+                    ) % {'user': team.mate2}
+                elif tournament.teams_total + len(accepted) >= tournament.limit:
+                    errors[code] = _('Tournament teams limit is over.')
+                else:
+                    accepted.append(team)
+                    participants.update(
+                        user for user in (team.mate1_id, team.mate2_id)
+                        if user is not None
+                    )
+
+            Tournament.teams.through.objects.bulk_create(
+                Tournament.teams.through(tournament_id=self.pk, team=team)
+                for team in accepted
+            )
+            Participant.objects.bulk_create(
+                Participant(tournament_id=self.pk, team=team, user_id=user)
+                for team in accepted
+                for user in (team.mate1_id, team.mate2_id) if user is not None
+            )
+            Tournament.objects.filter(pk=self.pk).update(
+                teams_total=models.F('teams_total') + len(accepted),
+                version=models.F('version') + 1,
+            )
+
+        self.teams_total = tournament.teams_total + len(accepted)
+
+        return accepted, errors
+
+    def get_registration_error(self, team: Team) -> ValidationError:
+        """Explain why the team registration breaks unique constraints."""
+        participant = (
+            Participant.objects
+            .filter(
+                tournament=self,
+                user_id__in=[team.mate1_id, team.mate2_id],
+            )
+            .select_related('user')
+            .first()
         )
 
-        if repeated_user:
-            raise ValidationError(
-                _('The %(user)s is already the tournament participant.'),
-                params={'user': repeated_user}
+        if participant is None or participant.team_id == team.pk:
+            return ValidationError(
+                _('Team already register at this tournament.'),
             )
 
-        self.teams.add(team)
+        return ValidationError(
+            _('The %(user)s is already the tournament participant.'),
+            params={'user': participant.user},
+        )
 
-    def activate(self):
-        if self.status != self.StatusChoice.OPENED:
-            raise ValidationError(
-                _('Can to activate only opened tournaments.'),
+    def activate(self) -> 'BracketJob':
+        """
+        Activate the tournament and enqueue its bracket initialization.
+
+        Notes:
+            Tournament row is locked while its teams are counted, so the
+            concurrent registration waits and is rejected by the changed
+            status. Teams total and the place table are set by the job, of
+            the teams it builds the bracket for.
+
+        Returns:
+            Bracket initialization job, it is sent to the worker on commit.
+        """
+        with transaction.atomic():
+            tournament = (
+                Tournament.objects
+                .select_for_update()
+                .only('status', 'version')
+                .get(pk=self.pk)
             )
 
-        if self.teams.all().count() < 4:
-            raise ValidationError(
-                _('Can not to start tournament with less then 4 teams.'),
+            if tournament.status != self.StatusChoice.OPENED:
+                raise ValidationError(
+                    _('Can to activate only opened tournaments.'),
+                )
+
+            if self.teams_count < 4:
+                raise ValidationError(
+                    _('Can not to start tournament with less then 4 teams.'),
+                )
+
+            self.status = self.StatusChoice.ACTIVE
+            self.start = timezone.now()
+            self.version = tournament.version + 1
+            Tournament.objects.filter(pk=self.pk).update(
+                status=self.status, start=self.start, version=self.version,
             )
 
-        self.status = self.StatusChoice.ACTIVE
-        self.start = datetime.now()
-        self.save()
+            job = BracketJob.objects.create(tournament=self)
 
-        from tournament.tasks import initialize_bracket
+            from tournament.tasks import initialize_bracket_job
 
-        initialize_bracket(self)
+            transaction.on_commit(
+                lambda: initialize_bracket_job.delay(job.code),
+            )
+
+        return job
+
+    def increment_version(self) -> int:
+        """
+        Increment the tournament version and return the new one.
+
+        Notes:
+            Updated row stays locked till the end of the transaction, so
+            concurrent bracket changes get the versions in the commit order
+            but are serialized from then on. Call it as the last statement
+            of the change transaction.
+        """
+        Tournament.objects.filter(pk=self.pk).update(
+            version=models.F('version') + 1,
+        )
+        self.version = (
+            Tournament.objects
+            .filter(pk=self.pk)
+            .values_list('version', flat=True)
+            .get()
+        )
+
+        return self.version
 
     def get_place_by_round_lose(self, round_number: int) -> str:
-        teams = self.teams_count
+        if self.place_table:
+            if not 0 < round_number <= len(self.place_table):
+                raise ValueError(_('Unexpected round number'))
+
+            return self.place_table[round_number - 1]
+
+        teams = self.teams_total
         border = self.get_next_power_of_2(teams)
 
         if round_number == 1:
             return f'{2 ** (border - 1) + 1}-{teams}'
 
-        if border - round_number - 1 < 1:
+        if not 1 < round_number < border:
             raise ValueError(_('Unexpected round number'))
 
-        upper = 2 ** (border - round_number - 1)
+        upper = 2 ** (border - round_number + 1)
 
         return '%d-%d' % (upper // 2 + 1, upper)
 
 
+class BracketJob(models.Model):
+    """Tournament bracket initialization background job."""
+
+    class StatusChoice(models.IntegerChoices):
+        PENDING = 0, _('pending')
+        RUNNING = 1, _('running')
+        DONE = 2, _('done')
+        FAILED = 3, _('failed')
+
+    code = models.CharField(
+        _('code'), max_length=32,
+        primary_key=True, default=get_uuid_hex,
+    )
+    tournament = models.ForeignKey(
+        Tournament, on_delete=models.CASCADE,
+        verbose_name=_('tournament'), related_name='bracket_jobs',
+    )
+    status = models.PositiveSmallIntegerField(
+        _('status'), choices=StatusChoice.choices,
+        default=StatusChoice.PENDING,
+    )
+    error = models.TextField(_('error'), blank=True, default='')
+
+    created = models.DateTimeField(_('date created'), auto_now_add=True)
+    finish = models.DateTimeField(_('finish date'), null=True, default=None)
+
+    class Meta:
+        verbose_name = _('bracket job')
+        verbose_name_plural = _('bracket jobs')
+        ordering = ['-created']
+
+
 class Round(models.Model):
+    class SlotChoice(models.IntegerChoices):
+        PARTICIPANT1 = 1, _('participant-1')
+        PARTICIPANT2 = 2, _('participant-2')
+
     tournament = models.ForeignKey(
         Tournament, on_delete=models.CASCADE,
         verbose_name=_('tournament'),
@@ -176,6 +411,11 @@ class Round(models.Model):
             'None value means this match is final.',
         ),
     )
+    next_slot = models.PositiveSmallIntegerField(
+        _('related match slot'), choices=SlotChoice.choices,
+        null=True, default=None,
+        help_text=_('Related match participant taken by the match winner.'),
+    )
 
     class Meta:
         verbose_name = _('tournament round')
@@ -189,6 +429,33 @@ class Round(models.Model):
         ]
 
 
+class Participant(models.Model):
+    """Tournament participant users index, one row per team mate."""
+
+    tournament = models.ForeignKey(
+        Tournament, on_delete=models.CASCADE,
+        verbose_name=_('tournament'), related_name='participants',
+    )
+    user = models.ForeignKey(
+        get_user_model(), on_delete=models.CASCADE,
+        verbose_name=_('user'), related_name='participations',
+    )
+    team = models.ForeignKey(
+        Team, on_delete=models.CASCADE,
+        verbose_name=_('team'), related_name='participations',
+    )
+
+    class Meta:
+        verbose_name = _('tournament participant')
+        verbose_name_plural = _('tournament participants')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tournament', 'user'],
+                name='tournament_user_participates_once',
+            ),
+        ]
+
+
 class Place(models.Model):
     tournament = models.ForeignKey(
         Tournament, on_delete=models.CASCADE,
@@ -217,3 +484,14 @@ class Place(models.Model):
             ['user', 'team', 'tournament'],
             ['user', 'tournament'],
         ]
+        # Keyset pagination order of the user and team places lists
+        indexes = [
+            models.Index(
+                fields=['user', '-created', '-id'],
+                name='place_user_created_idx',
+            ),
+            models.Index(
+                fields=['team', '-created', '-id'],
+                name='place_team_created_idx',
+            ),
+        ]
@@ -1,8 +1,13 @@
 from rest_framework import serializers
+from django.utils.translation import gettext_lazy as _
 
+from utils.serializers import SparseFieldsMixin
 from account.serializers import TeamSerializer
-from match.serializers import MatchWithParticipantSerializer
-from tournament.models import Tournament, Round, Place
+from match.serializers import (
+    MatchWithParticipantSerializer,
+    MatchResultSerializer,
+)
+from tournament.models import Tournament, Round, Place, BracketJob
 
 
 class TournamentSerializer(serializers.ModelSerializer):
@@ -15,7 +20,9 @@ class TournamentSerializer(serializers.ModelSerializer):
         read_only_fields = ('code',)
 
 
-class RetrieveTournamentSerializer(serializers.ModelSerializer):
+class RetrieveTournamentSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer,
+):
     status = serializers.CharField(source='get_status_display')
 
     class Meta:
@@ -24,6 +31,15 @@ class RetrieveTournamentSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class BracketJobSerializer(serializers.ModelSerializer):
+    status = serializers.CharField(source='get_status_display')
+
+    class Meta:
+        model = BracketJob
+        fields = ('code', 'tournament', 'status', 'error', 'created', 'finish')
+        read_only_fields = fields
+
+
 class TournamentRoundSerializer(serializers.ModelSerializer):
     match = MatchWithParticipantSerializer()
 
@@ -33,7 +49,78 @@ class TournamentRoundSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class PlaceSerializer(serializers.ModelSerializer):
+class RoundResultsSerializer(serializers.Serializer):
+    round = serializers.IntegerField(min_value=1)
+    results = MatchResultSerializer(many=True, allow_empty=False)
+
+    def validate_results(self, value):
+        codes = [result['match'] for result in value]
+
+        if len(codes) != len(set(codes)):
+            raise serializers.ValidationError(
+                _('Every match result must be given once.'),
+            )
+
+        return value
+
+
+class BracketQuerySerializer(serializers.Serializer):
+    layout = serializers.ChoiceField(
+        choices=['rounds', 'tree'], default='rounds',
+        help_text=_(
+            'Rounds list or the compact tree of the adjacency arrays.'
+        ),
+    )
+    rounds = serializers.IntegerField(
+        min_value=1, required=False,
+        help_text=_('First rounds count to load, tree layout only.'),
+    )
+
+
+class BracketChangesQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(
+        min_value=0,
+        help_text=_('Sequence of the last known bracket change.'),
+    )
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    output = serializers.ChoiceField(
+        choices=['ndjson', 'csv'], default='ndjson',
+        help_text=_('Newline delimited JSON objects or CSV with the header.'),
+    )
+    since = serializers.DateTimeField(
+        required=False, help_text=_('Date range start, inclusive.'),
+    )
+    until = serializers.DateTimeField(
+        required=False, help_text=_('Date range end, exclusive.'),
+    )
+    status = serializers.CharField(
+        required=False, help_text=_('Status label of the exported rows.'),
+    )
+
+    def validate_status(self, value):
+        statuses = {
+            str(label): status
+            for status, label in self.context['export'].statuses.choices
+        }
+
+        if value not in statuses:
+            raise serializers.ValidationError(
+                _('Unknown status "%(status)s".') % {'status': value},
+            )
+
+        return statuses[value]
+
+
+class BulkTeamRegisterSerializer(serializers.Serializer):
+    teams = serializers.ListField(
+        child=serializers.CharField(max_length=32),
+        allow_empty=False, max_length=4096,
+    )
+
+
+class PlaceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tournament = RetrieveTournamentSerializer(read_only=True)
 
     class Meta:
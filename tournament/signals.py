@@ -0,0 +1,105 @@
+from django.dispatch import receiver
+from django.db.models import signals, F, Q, OuterRef, Subquery
+
+from account.models import Team
+from match.models import Match
+from tournament.models import Tournament, Round
+from tournament.live import publish_tournaments_changes
+from tournament.snapshots import invalidate_bracket_snapshots
+
+
+def touch_tournaments(codes: list[str], matches: Q = None) -> None:
+    """
+    Increment versions, drop bracket snapshots and publish bracket changes
+    of the tournaments.
+
+    Attributes:
+        codes: tournament codes.
+        matches: changed matches filter, they are marked by the new version
+            of their tournament.
+    """
+    if not codes:
+        return
+
+    Tournament.objects.filter(pk__in=codes).update(version=F('version') + 1)
+
+    if matches is not None:
+        Match.objects.filter(matches).update(sequence=Subquery(
+            Tournament.objects
+            .filter(round__match=OuterRef('pk'))
+            .values('version')[:1]
+        ))
+
+    invalidate_bracket_snapshots(codes)
+    publish_tournaments_changes(codes)
+
+
+@receiver(
+    signal=signals.post_save, sender=Match,
+    dispatch_uid='touch_tournament_on_match_save',
+)
+def touch_tournament_on_match_save(instance, created, **kwargs):
+    if created:
+        return
+
+    touch_tournaments(
+        list(
+            Round.objects
+            .filter(match=instance)
+            .values_list('tournament_id', flat=True)
+        ),
+        Q(pk=instance.pk),
+    )
+
+
+@receiver(
+    signal=signals.post_save, sender=Team,
+    dispatch_uid='touch_tournaments_on_team_save',
+)
+def touch_tournaments_on_team_save(instance, created, **kwargs):
+    """Tournament teams and bracket representations include team data."""
+    if created:
+        return
+
+    touch_tournaments(
+        list(
+            Tournament.objects
+            .filter(teams=instance)
+            .values_list('code', flat=True)
+        ),
+        Q(participant1=instance) | Q(participant2=instance),
+    )
+
+
+@receiver(
+    signal=signals.m2m_changed, sender=Tournament.teams.through,
+    dispatch_uid='touch_tournaments_on_teams_change',
+)
+def touch_tournaments_on_teams_change(
+    instance, action, reverse, pk_set, **kwargs,
+):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if not reverse:
+        touch_tournaments([instance.pk])
+    elif pk_set is not None:
+        touch_tournaments(list(pk_set))
+    else:
+        touch_tournaments(list(
+            Tournament.objects
+            .filter(teams=instance)
+            .values_list('code', flat=True)
+        ))
+
+
+@receiver(
+    signal=signals.post_save, sender=Tournament,
+    dispatch_uid='invalidate_bracket_snapshot_on_tournament_save',
+)
+@receiver(
+    signal=signals.post_delete, sender=Tournament,
+    dispatch_uid='invalidate_bracket_snapshot_on_tournament_delete',
+)
+def invalidate_bracket_snapshot_on_tournament_change(instance, **kwargs):
+    invalidate_bracket_snapshots([instance.pk])
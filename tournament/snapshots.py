@@ -0,0 +1,268 @@
+from typing import AsyncIterator, Iterable, Iterator, Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import QuerySet
+
+from rest_framework.fields import DateTimeField
+
+from utils.views import stream_json_list, astream_json_list
+from account.models import Team
+from account.serializers import TeamSerializer
+from match.models import Match
+from tournament.models import Tournament, Round
+from tournament.bracket import Bracket
+from tournament.serializers import TournamentRoundSerializer
+
+
+def get_snapshot_key(code: str) -> str:
+    return f'tournament:{code}:bracket'
+
+
+def get_tree_key(code: str) -> str:
+    return f'tournament:{code}:tree'
+
+
+def get_bracket_rounds(code: str) -> QuerySet:
+    return (
+        Round.objects
+        .filter(tournament_id=code)
+        .order_by('number')
+        .select_related('match__participant1', 'match__participant2')
+    )
+
+
+def is_bracket_cached(teams_total: int) -> bool:
+    """Bigger brackets are streamed from the database, not cached."""
+    return teams_total - 1 <= settings.BRACKET_SNAPSHOT_MAX_MATCHES
+
+
+def stream_bracket_rounds(code: str) -> Iterator[bytes]:
+    """JSON of the not cached bracket rounds, loaded by chunks."""
+    return stream_json_list(
+        get_bracket_rounds(code).iterator(settings.STREAM_CHUNK_SIZE),
+        TournamentRoundSerializer(),
+    )
+
+
+def astream_bracket_rounds(code: str) -> AsyncIterator[bytes]:
+    return astream_json_list(
+        get_bracket_rounds(code).aiterator(settings.STREAM_CHUNK_SIZE),
+        TournamentRoundSerializer(),
+    )
+
+
+def get_versioned(cached: Optional[tuple], version: int):
+    """
+    Return the cached value if it is built of the given tournament version.
+
+    Notes:
+        Values are cached with the tournament version read before the data,
+        so the value built concurrently with a change is never served after
+        the change, even if cached after the change invalidated the key.
+    """
+    if cached is None or cached[0] != version:
+        return None
+
+    return cached[1]
+
+
+def get_bracket_snapshot(code: str, version: int) -> Optional[list[dict]]:
+    """Return the cached tournament bracket snapshot or None."""
+    return get_versioned(cache.get(get_snapshot_key(code)), version)
+
+
+async def aget_bracket_snapshot(
+    code: str, version: int,
+) -> Optional[list[dict]]:
+    return get_versioned(await cache.aget(get_snapshot_key(code)), version)
+
+
+def build_bracket_snapshot(code: str, version: int) -> list[dict]:
+    """
+    Serialize the tournament bracket rounds ordered by number and cache the
+    result.
+
+    Notes:
+        Snapshots of the opened tournaments must not be built, they have no
+        bracket yet.
+
+    Attributes:
+        version: tournament version read before the rounds.
+    """
+    snapshot = list(
+        TournamentRoundSerializer(get_bracket_rounds(code), many=True).data
+    )
+
+    cache.set(
+        get_snapshot_key(code), (version, snapshot),
+        settings.BRACKET_SNAPSHOT_TIMEOUT,
+    )
+    return snapshot
+
+
+async def abuild_bracket_snapshot(code: str, version: int) -> list[dict]:
+    """Async `build_bracket_snapshot`, rounds are loaded by the async ORM."""
+    rounds = [round async for round in get_bracket_rounds(code)]
+    snapshot = list(TournamentRoundSerializer(rounds, many=True).data)
+
+    await cache.aset(
+        get_snapshot_key(code), (version, snapshot),
+        settings.BRACKET_SNAPSHOT_TIMEOUT,
+    )
+    return snapshot
+
+
+def build_bracket_tree(code: str, rounds: Optional[int] = None) -> dict:
+    """
+    Serialize the tournament bracket as the adjacency arrays.
+
+    Notes:
+        Match attributes are the parallel arrays ordered by round and by
+        the bracket position in the round. `next` is the next match index
+        (None for the final match or if the next match is not loaded) and
+        `slot` is its participant slot taken by the winner. Teams are
+        serialized once to the `teams` table, matches refer them by index.
+        Statuses are indexes of the `statuses` labels.
+
+    Attributes:
+        code: tournament code.
+        rounds: first rounds count to load, all rounds by default.
+    """
+    queryset = (
+        Round.objects
+        .filter(tournament_id=code)
+        .order_by('number', 'pk')
+    )
+    if rounds is not None:
+        queryset = queryset.filter(number__lte=rounds)
+
+    rows = list(queryset.values_list(
+        'number', 'next_slot', 'match_id', 'next_match_id',
+        'match__status', 'match__participant1_id', 'match__participant2_id',
+        'match__score1', 'match__score2', 'match__finish',
+    ))
+    indexes = {row[2]: index for index, row in enumerate(rows)}
+
+    # Team code -> team table index relation in the order of appearance
+    teams: dict[str, int] = {}
+    finish_field = DateTimeField()
+
+    matches = {
+        'code': [], 'round': [], 'status': [], 'team1': [], 'team2': [],
+        'score1': [], 'score2': [], 'finish': [], 'next': [], 'slot': [],
+    }
+    for (
+        number, slot, match, next_match, status,
+        team1, team2, score1, score2, finish,
+    ) in rows:
+        matches['code'].append(match)
+        matches['round'].append(number)
+        matches['status'].append(status)
+        matches['team1'].append(
+            None if team1 is None else teams.setdefault(team1, len(teams)),
+        )
+        matches['team2'].append(
+            None if team2 is None else teams.setdefault(team2, len(teams)),
+        )
+        matches['score1'].append(score1)
+        matches['score2'].append(score2)
+        matches['finish'].append(
+            None if finish is None else finish_field.to_representation(finish),
+        )
+        matches['next'].append(indexes.get(next_match))
+        matches['slot'].append(slot)
+
+    teams_total = (
+        Tournament.objects
+        .filter(pk=code)
+        .values_list('teams_total', flat=True)
+        .get()
+    )
+    team_objects = Team.objects.in_bulk(teams)
+
+    return {
+        'rounds': Bracket.get_rounds_count(teams_total),
+        'statuses': [label for _value, label in Match.StatusChoice.choices],
+        'teams': list(TeamSerializer(
+            [team_objects[team] for team in teams], many=True,
+        ).data),
+        'matches': matches,
+    }
+
+
+def get_tree_snapshot(code: str, version: int) -> Optional[dict]:
+    """Return the cached whole tournament bracket tree or None."""
+    return get_versioned(cache.get(get_tree_key(code)), version)
+
+
+def build_tree_snapshot(code: str, version: int) -> dict:
+    """
+    Build the whole tournament bracket tree and cache the result with the
+    tournament version read before it.
+    """
+    tree = build_bracket_tree(code)
+
+    cache.set(
+        get_tree_key(code), (version, tree),
+        settings.BRACKET_SNAPSHOT_TIMEOUT,
+    )
+    return tree
+
+
+def get_bracket_changes(tournament: Tournament, since: int) -> dict:
+    """
+    Serialize the tournament bracket rounds with matches changed after the
+    given sequence.
+
+    Notes:
+        Returned sequence is the tournament version read before the rounds,
+        so the change committed in between is returned twice at most, but is
+        never lost.
+    """
+    queryset = (
+        Round.objects
+        .filter(tournament=tournament, match__sequence__gt=since)
+        .order_by('number')
+        .select_related('match__participant1', 'match__participant2')
+    )
+
+    return {
+        'sequence': tournament.version,
+        'matches': TournamentRoundSerializer(queryset, many=True).data,
+    }
+
+
+def invalidate_bracket_snapshots(codes: Iterable[str]) -> None:
+    """Drop the tournaments bracket snapshots after the commit."""
+    keys = [
+        key for code in codes
+        for key in (get_snapshot_key(code), get_tree_key(code))
+    ]
+
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def warm_bracket_snapshots() -> int:
+    """Build missing bracket snapshots of the active tournaments."""
+    keys = {
+        get_snapshot_key(code): (code, version) for code, version in (
+            Tournament.objects
+            .filter(
+                status=Tournament.StatusChoice.ACTIVE,
+                teams_total__lte=settings.BRACKET_SNAPSHOT_MAX_MATCHES + 1,
+            )
+            .values_list('code', 'version')
+        )
+    }
+    cached = cache.get_many(keys)
+
+    missing = [
+        (code, version) for key, (code, version) in keys.items()
+        if get_versioned(cached.get(key), version) is None
+    ]
+    for code, version in missing:
+        build_bracket_snapshot(code, version)
+
+    return len(missing)
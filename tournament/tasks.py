@@ -1,36 +1,134 @@
+from typing import Optional, Sequence
+from celery import shared_task
+from django.db import transaction
+from django.db.models import F
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from match.models import Match
-from tournament.models import Tournament, Round
-from tournament.generate_bracket import generate_bracket, RoundMatches
+from tournament.models import Tournament, Round, BracketJob
+from tournament.bracket import Bracket, get_bracket
+from tournament.snapshots import invalidate_bracket_snapshots
 
 
+def get_bracket_rows(
+    tournament: Tournament, bracket: Bracket, teams: Sequence[str],
+) -> tuple[list[Match], list[Round]]:
+    """
+    Return not saved bracket matches and rounds of the tournament.
+
+    Attributes:
+        tournament: tournament to build the bracket for, its version marks
+            the created matches.
+        bracket: bracket shape for the teams count.
+        teams: participant team codes in the registration order.
+    """
+    # Slot -> match relation, unused slots stay None
+    slot_matches: list[Optional[Match]] = [None] * len(bracket.status)
+    for slot, participant1, participant2 in bracket.project(teams):
+        slot_matches[slot] = Match(
+            status=bracket.status[slot],
+            sequence=tournament.version,
+            participant1_id=participant1,
+            participant2_id=participant2,
+        )
+
+    rounds = [
+        Round(
+            tournament=tournament,
+            number=bracket.round[slot],
+            match=match,
+            next_match=(
+                slot_matches[bracket.parent(slot)] if slot > 0 else None
+            ),
+            next_slot=(
+                (Round.SlotChoice.PARTICIPANT1 if slot % 2 else
+                 Round.SlotChoice.PARTICIPANT2) if slot > 0 else None
+            ),
+        ) for slot, match in enumerate(slot_matches) if match
+    ]
+
+    return [round.match for round in rounds], rounds
+
+
+def get_registered_teams(tournament: Tournament) -> list[str]:
+    return list(
+        Tournament.teams.through.objects
+        .filter(tournament=tournament)
+        .order_by('pk')
+        .values_list('team_id', flat=True)
+    )
+
+
+@transaction.atomic
 def initialize_bracket(tournament: Tournament) -> list[Round]:
+    """
+    Insert the bracket of the activated tournament registered teams.
+
+    Notes:
+        Teams total and the place table are set of the teams the bracket is
+        built for, registrations are closed by the activation.
+    """
     if Round.objects.filter(tournament=tournament).exists():
         raise ValidationError(
             _('The "%(name)s" tournament bracket already exists.'),
             params={'name': tournament.name},
         )
 
-    light_matches: RoundMatches = {}
-    generate_bracket(tournament.teams.all(), light_matches)
+    tournament.increment_version()
 
-    matches = Match.objects.bulk_create(
-        Match(
-            status=match.status,
-            participant1=match.teams[0] if len(match.teams) > 0 else None,
-            participant2=match.teams[1] if len(match.teams) == 2 else None,
-        ) for match in light_matches.keys()
-    )
+    teams = get_registered_teams(tournament)
+    bracket = get_bracket(len(teams))
+    matches, rounds = get_bracket_rows(tournament, bracket, teams)
 
-    rounds = Round.objects.bulk_create(
-        Round(
-            tournament=tournament,
-            number=child.round,
-            match=matches[child.id],
-            next_match=matches[parent.id] if parent else None,
-        ) for child, parent in light_matches.items()
+    tournament.teams_total = bracket.size
+    tournament.place_table = bracket.get_places()
+    Tournament.objects.filter(pk=tournament.pk).update(
+        teams_total=tournament.teams_total,
+        place_table=tournament.place_table,
     )
 
-    return rounds
+    Match.objects.bulk_create(matches)
+    invalidate_bracket_snapshots([tournament.pk])
+    return Round.objects.bulk_create(rounds)
+
+
+@shared_task
+def initialize_bracket_job(code: str) -> None:
+    """
+    Run the pending bracket job, the job is taken by one worker only.
+
+    Notes:
+        Tournament of the failed job is opened again, so it can be
+        activated by the new job.
+    """
+    taken = BracketJob.objects.filter(
+        pk=code, status=BracketJob.StatusChoice.PENDING,
+    ).update(status=BracketJob.StatusChoice.RUNNING)
+
+    if not taken:
+        return
+
+    job = BracketJob.objects.select_related('tournament').get(pk=code)
+
+    try:
+        initialize_bracket(job.tournament)
+    except Exception as err:
+        with transaction.atomic():
+            BracketJob.objects.filter(pk=code).update(
+                status=BracketJob.StatusChoice.FAILED,
+                error=str(err), finish=timezone.now(),
+            )
+            Tournament.objects.filter(
+                pk=job.tournament_id, status=Tournament.StatusChoice.ACTIVE,
+            ).update(
+                status=Tournament.StatusChoice.OPENED, start=None,
+                place_table=[], version=F('version') + 1,
+            )
+            invalidate_bracket_snapshots([job.tournament_id])
+        raise
+
+    BracketJob.objects.filter(pk=code).update(
+        status=BracketJob.StatusChoice.DONE, finish=timezone.now(),
+    )
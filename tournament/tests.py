@@ -1,3 +1,720 @@
-from django.test import TestCase
+import json
+import asyncio
+from typing import NamedTuple, Sequence
+from unittest.mock import patch
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count, F
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from account.models import User, Team
+from match.models import Match
+from tournament.models import Tournament, Round, Place
+from tournament.models import BracketJob
+from tournament.bracket import EMPTY, Bracket, get_bracket
+from tournament.generate_bracket import TournamentRoundMatch, generate_bracket
+from tournament.validators import place_value_validator
+from tournament.activation import activate_tournaments, build_brackets
+from tournament.live import get_bracket_channel, get_event_id
+from utils.pubsub import get_broker
+from utils.testing import (
+    QueryBudgetTestCase, async_get, create_teams, create_tournament,
+    create_user, get_client, get_organizer_client, get_ready_matches,
+)
+
+
+def get_legacy_tree(
+    match: TournamentRoundMatch, children: dict,
+) -> tuple:
+    """Status, round, first round teams and subtrees of the match."""
+    return (
+        int(match.status), match.round,
+        match.teams if not children[match] else (),
+        tuple(get_legacy_tree(child, children) for child in children[match]),
+    )
+
+
+def get_tree(bracket: Bracket, slot: int = 0) -> tuple:
+    slots = [
+        child for child in bracket.children(slot)
+        if child < len(bracket.status) and bracket.status[child] != EMPTY
+    ]
+    teams = tuple(
+        team for team in (bracket.team1[slot], bracket.team2[slot])
+        if team != EMPTY
+    )
+
+    return (
+        bracket.status[slot], bracket.round[slot],
+        teams if not slots else (),
+        tuple(get_tree(bracket, child) for child in slots),
+    )
+
+
+class BracketTestCase(SimpleTestCase):
+    sizes = (*range(1, 300), 511, 512, 513, 4096)
+
+    def test_same_as_generate_bracket(self):
+        for size in self.sizes:
+            with self.subTest(size=size):
+                matches = {}
+                final = generate_bracket(list(range(size)), matches)
+
+                # Children in the creation order, the upper one first
+                children = {match: [] for match in matches}
+                for match, next_match in matches.items():
+                    if next_match is not None:
+                        children[next_match].append(match)
+
+                bracket = Bracket(size)
+
+                self.assertEqual(len(bracket), len(matches))
+                self.assertEqual(bracket.rounds, final.round)
+                self.assertEqual(
+                    get_tree(bracket), get_legacy_tree(final, children),
+                )
+
+    def test_places(self):
+        for size, places in (
+            (4, ['3-4', '2']),
+            (5, ['5', '3-4', '2']),
+            (8, ['5-8', '3-4', '2']),
+            (9, ['7-9', '5-6', '3-4', '2']),
+        ):
+            with self.subTest(size=size):
+                self.assertEqual(Bracket(size).get_places(), places)
+
+    def test_places_cover_every_loser(self):
+        for size in self.sizes[1:]:
+            with self.subTest(size=size):
+                covered = []
+                for place in reversed(Bracket(size).get_places()):
+                    if place is not None:
+                        first, _, last = place.partition('-')
+                        covered += range(int(first), int(last or first) + 1)
+
+                self.assertEqual(covered, list(range(2, size + 1)))
+
+    def test_project_checks_teams_count(self):
+        with self.assertRaises(ValueError):
+            list(Bracket(4).project(['a', 'b', 'c']))
+
+    def test_empty_bracket(self):
+        with self.assertRaises(ValueError):
+            Bracket(0)
+
+
+class TournamentLimitTestCase(TestCase):
+    def create(self, limit: int):
+        return get_client(create_user()).post('/api/tournaments/', {
+            'name': f'limit{limit}', 'description': 'description',
+            'limit': limit,
+        }, format='json')
+
+    def test_limit_boundary(self):
+        self.assertEqual(self.create(4096).status_code, 201)
+        self.assertEqual(self.create(4097).status_code, 400)
+        self.assertEqual(self.create(3).status_code, 400)
+
+    def test_places_of_limit_bracket(self):
+        places = Bracket(4096).get_places()
+
+        self.assertEqual(places[0], '2049-4096')
+        for place in places:
+            place_value_validator(place)
+
+
+class TournamentRequest(NamedTuple):
+    """Client and the tournament data of the budgeted request."""
+    client: APIClient
+    tournament: Tournament
+    teams: Sequence[Team] = ()
+    matches: Sequence[Match] = ()
+
+
+def get_organizer_request(tournament: Tournament) -> TournamentRequest:
+    return TournamentRequest(get_organizer_client(tournament), tournament)
+
+
+def get_register_request(tournament: Tournament) -> TournamentRequest:
+    """Request of the teams registration, the limit fits the new teams."""
+    tournament.limit = 128
+    tournament.save(update_fields=['limit'])
+
+    return TournamentRequest(
+        get_organizer_client(tournament), tournament, teams=create_teams(4),
+    )
+
+
+class TournamentQueryBudgetTestCase(QueryBudgetTestCase):
+    def check_codes(self, response, tournament: Tournament):
+        self.assertIn(
+            tournament.pk,
+            [item['code'] for item in response.json()['results']],
+        )
+
+    def check_code(self, response, tournament: Tournament):
+        self.assertEqual(response.json()['code'], tournament.pk)
+
+    def check_rounds(self, response, tournament: Tournament):
+        self.assertEqual(
+            [item['tournament'] for item in response.json()],
+            [tournament.pk] * (tournament.teams_total - 1),
+        )
+
+    def check_job(self, response, tournament: Tournament):
+        self.assertEqual(response.json()['tournament'], tournament.pk)
+
+    def test_list(self):
+        self.assertQueryBudget(
+            1, lambda tournament: get_client().get('/api/tournaments/'),
+            check=self.check_codes,
+        )
+
+    def test_async_list(self):
+        self.assertQueryBudget(
+            1, lambda tournament: async_get('/api/async/tournaments/'),
+            check=self.check_codes,
+        )
+
+    def test_create(self):
+        def check(response, prepared: TournamentRequest):
+            self.assertEqual(response.json()['name'], prepared.tournament.pk)
+
+        self.assertQueryBudget(3, lambda prepared: prepared.client.post(
+            '/api/tournaments/', {
+                'name': prepared.tournament.pk, 'description': 'description',
+                'limit': 8,
+            }, format='json',
+        ), status_code=201, prepare=get_organizer_request, check=check)
+
+    def test_retrieve(self):
+        self.assertQueryBudget(2, lambda tournament: get_client().get(
+            f'/api/tournaments/{tournament.pk}/',
+        ), check=self.check_code)
+
+    def test_async_retrieve(self):
+        self.assertQueryBudget(1, lambda tournament: async_get(
+            f'/api/async/tournaments/{tournament.pk}/',
+        ), check=self.check_code)
+
+    def test_teams(self):
+        def check(response, tournament: Tournament):
+            self.assertEqual(
+                [team['code'] for team in response.json()['results']],
+                list(
+                    tournament.teams
+                    .order_by('name')
+                    .values_list('pk', flat=True)[:10]
+                ),
+            )
+
+        self.assertQueryBudget(3, lambda tournament: get_client().get(
+            f'/api/tournaments/{tournament.pk}/teams/',
+        ), check=check)
+
+    def test_matches(self):
+        self.assertQueryBudget(3, lambda tournament: get_client().get(
+            f'/api/tournaments/{tournament.pk}/matches/',
+        ), check=self.check_rounds)
+
+    def test_matches_tree(self):
+        def check(response, tournament: Tournament):
+            tree = response.json()
+
+            self.assertEqual(
+                tree['rounds'],
+                Bracket.get_rounds_count(tournament.teams_total),
+            )
+            self.assertEqual(
+                len(tree['matches']['round']), tournament.teams_total - 1,
+            )
+
+        self.assertQueryBudget(5, lambda tournament: get_client().get(
+            f'/api/tournaments/{tournament.pk}/matches/?layout=tree',
+        ), check=check)
+
+    def test_matches_since(self):
+        def check(response, tournament: Tournament):
+            changes = response.json()
+
+            self.assertEqual(changes['sequence'], tournament.version)
+            self.assertEqual(
+                len(changes['matches']), tournament.teams_total - 1,
+            )
+
+        self.assertQueryBudget(3, lambda tournament: get_client().get(
+            f'/api/tournaments/{tournament.pk}/matches/?since=0',
+        ), check=check)
+
+    def test_async_matches(self):
+        self.assertQueryBudget(2, lambda tournament: async_get(
+            f'/api/async/tournaments/{tournament.pk}/matches/',
+        ), check=self.check_rounds)
+
+    @override_settings(BRACKET_SNAPSHOT_MAX_MATCHES=2)
+    def test_streamed_matches(self):
+        # Rounds are read by the one chunked query, not cached
+        def request(tournament):
+            response = get_client().get(
+                f'/api/tournaments/{tournament.pk}/matches/',
+            )
+            rounds = json.loads(b''.join(response.streaming_content))
+
+            self.assertEqual(len(rounds), tournament.teams_total - 1)
+            return response
+
+        self.assertQueryBudget(3, request, sizes=(16, 64))
+
+    @override_settings(BRACKET_SNAPSHOT_MAX_MATCHES=2)
+    def test_async_streamed_matches(self):
+        async def read(content) -> bytes:
+            return b''.join([chunk async for chunk in content])
+
+        def request(tournament):
+            response = async_get(
+                f'/api/async/tournaments/{tournament.pk}/matches/',
+            )
+            rounds = json.loads(
+                async_to_sync(read)(response.streaming_content),
+            )
+
+            self.assertEqual(len(rounds), tournament.teams_total - 1)
+            return response
+
+        self.assertQueryBudget(2, request, sizes=(16, 64))
+
+    def test_activation(self):
+        self.assertQueryBudget(2, lambda tournament: get_client().get(
+            f'/api/tournaments/{tournament.pk}/activation/',
+        ), check=self.check_job)
+
+    def test_activate(self):
+        # Bracket is generated by the job, out of the request, the teams
+        # are counted in the savepoint locking the tournament
+        def check(response, prepared: TournamentRequest):
+            self.check_job(response, prepared.tournament)
+
+        self.assertQueryBudget(8, lambda prepared: prepared.client.put(
+            f'/api/tournaments/{prepared.tournament.pk}/activate/',
+        ), status_code=202, activate=False,
+            prepare=get_organizer_request, check=check)
+
+    def test_register(self):
+        def prepare(tournament):
+            prepared = get_register_request(tournament)
+
+            return prepared._replace(
+                client=get_client(prepared.teams[0].mate1),
+            )
+
+        def check(response, prepared: TournamentRequest):
+            self.assertTrue(
+                prepared.tournament.teams
+                .filter(pk=prepared.teams[0].pk)
+                .exists()
+            )
+
+        self.assertQueryBudget(9, lambda prepared: prepared.client.post(
+            f'/api/tournaments/{prepared.tournament.pk}/register/',
+            {'team': prepared.teams[0].pk}, format='json',
+        ), status_code=201, activate=False, prepare=prepare, check=check)
+
+    def test_bulk_register(self):
+        def check(response, prepared: TournamentRequest):
+            self.assertEqual(response.json(), {
+                'registered': [team.pk for team in prepared.teams],
+                'errors': {},
+            })
+
+        self.assertQueryBudget(11, lambda prepared: prepared.client.post(
+            f'/api/tournaments/{prepared.tournament.pk}/register/bulk/',
+            {'teams': [team.pk for team in prepared.teams]}, format='json',
+        ), status_code=201, activate=False,
+            prepare=get_register_request, check=check)
+
+    def test_round_results(self):
+        def prepare(tournament):
+            return get_organizer_request(tournament)._replace(
+                matches=get_ready_matches(tournament),
+            )
+
+        def check(response, prepared: TournamentRequest):
+            # Both mates of every loser are placed
+            self.assertEqual(
+                sorted(place['team'] for place in response.json()),
+                sorted(
+                    team for match in prepared.matches
+                    for team in [match.participant1_id] * 2
+                ),
+            )
+
+        self.assertQueryBudget(13, lambda prepared: prepared.client.post(
+            f'/api/tournaments/{prepared.tournament.pk}/results/', {
+                'round': 1,
+                'results': [
+                    {'match': match.pk, 'score1': 0, 'score2': 1}
+                    for match in prepared.matches
+                ],
+            }, format='json',
+        ), status_code=201, prepare=prepare, check=check)
+
+    def test_export(self):
+        # Rows are read while the response is streamed
+        rows = []
+
+        def request(client):
+            response = client.get('/api/exports/matches/')
+            rows[:] = b''.join(response.streaming_content).splitlines()
+
+            return response
+
+        self.assertQueryBudget(
+            1, request, prepare=lambda tournament: get_client(
+                User.objects.create_superuser(
+                    email=f'{tournament.pk}@example.com',
+                    password='password',
+                ),
+            ), check=lambda response, client: self.assertEqual(
+                len(rows), Match.objects.count(),
+            ),
+        )
+
+
+class BulkRegisterTestCase(TestCase):
+    def setUp(self):
+        self.tournament = create_tournament(2, activate=False, limit=5)
+        self.client = get_organizer_client(self.tournament)
+
+    def register(self, codes: list[str]):
+        return self.client.post(
+            f'/api/tournaments/{self.tournament.pk}/register/bulk/',
+            {'teams': codes}, format='json',
+        )
+
+    def test_partial_registration(self):
+        registered = self.tournament.teams.first()
+        teams = create_teams(3)
+        mate = Team.objects.create(
+            name='mate', mate1=registered.mate1, mate2=create_user(),
+        )
+
+        response = self.register([
+            teams[0].pk, teams[0].pk, registered.pk, mate.pk, 'missing',
+            teams[1].pk, teams[2].pk,
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['registered'], [
+            teams[0].pk, teams[1].pk, teams[2].pk,
+        ])
+        self.assertEqual(response.data['errors'], {
+            registered.pk: 'Team already register at this tournament.',
+            mate.pk: (
+                f'The {registered.mate1} is already the tournament '
+                f'participant.'
+            ),
+            'missing': 'Team does not exist.',
+        })
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.teams_total, 5)
+        self.assertEqual(self.tournament.teams.count(), 5)
+
+    def test_limit(self):
+        teams = create_teams(4)
+
+        response = self.register([team.pk for team in teams])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            response.data['registered'], [team.pk for team in teams[:3]],
+        )
+        self.assertEqual(response.data['errors'], {
+            teams[3].pk: 'Tournament teams limit is over.',
+        })
+
+        response = self.register([teams[3].pk])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['registered'], [])
+
+    def test_closed_tournament(self):
+        Tournament.objects.filter(pk=self.tournament.pk).update(
+            status=Tournament.StatusChoice.ACTIVE,
+        )
+
+        response = self.register([create_teams(1)[0].pk])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('details', response.data)
+
+
+class BracketSnapshotTestCase(TestCase):
+    """
+    Snapshot cached after the change invalidated it is not served, the
+    change is made by the queryset updates not dropping the snapshot.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.tournament = create_tournament(4)
+        self.match = get_ready_matches(self.tournament)[0]
+
+    def change_bracket(self) -> None:
+        Match.objects.filter(pk=self.match.pk).update(score1=7)
+        Tournament.objects.filter(pk=self.tournament.pk).update(
+            version=F('version') + 1,
+        )
+
+    def get_scores(self, response) -> list:
+        return [
+            row['match']['score1'] for row in response.json()
+            if row['match']['code'] == self.match.pk
+        ]
+
+    def test_matches(self):
+        path = f'/api/tournaments/{self.tournament.pk}/matches/'
+
+        self.assertEqual(self.get_scores(get_client().get(path)), [None])
+        self.change_bracket()
+        self.assertEqual(self.get_scores(get_client().get(path)), [7])
+
+    def test_async_matches(self):
+        path = f'/api/async/tournaments/{self.tournament.pk}/matches/'
+
+        self.assertEqual(self.get_scores(async_get(path)), [None])
+        self.change_bracket()
+        self.assertEqual(self.get_scores(async_get(path)), [7])
+
+    def test_tree(self):
+        path = (
+            f'/api/tournaments/{self.tournament.pk}/matches/?layout=tree'
+        )
+
+        def get_score():
+            matches = get_client().get(path).json()['matches']
+            return matches['score1'][matches['code'].index(self.match.pk)]
+
+        self.assertIsNone(get_score())
+        self.change_bracket()
+        self.assertEqual(get_score(), 7)
+
+
+class BracketPublishTestCase(TestCase):
+    """Bracket changes made by the signals reach the stream subscribers."""
+
+    def save_team(self, team: Team) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            team.save()
+
+    def test_team_save_is_published(self):
+        tournament = create_tournament(4)
+        team = Team.objects.filter(tournaments=tournament).first()
+
+        async def receive():
+            async with get_broker().subscribe(
+                get_bracket_channel(tournament.pk),
+            ) as channel:
+                await sync_to_async(self.save_team)(team)
+                return await asyncio.wait_for(channel.get(), 1)
+
+        event = async_to_sync(receive)()
+
+        self.assertEqual(get_event_id(event), tournament.version + 1)
+        self.assertIn(f'"code": "{team.pk}"', event)
+
+
+class MatchChangesTestCase(TestCase):
+    """Every settled match change is marked by its tournament version."""
+
+    def get_changes(self, tournament: Tournament, since: int) -> dict:
+        return get_client().get(
+            f'/api/tournaments/{tournament.pk}/matches/?since={since}',
+        ).json()
+
+    def test_finished_matches_are_changed(self):
+        tournament = create_tournament(4)
+        client = get_organizer_client(tournament)
+        final = Match.objects.get(
+            round__tournament=tournament, round__next_match__isnull=True,
+        )
+        since = tournament.version
+
+        for match in get_ready_matches(tournament):
+            client.put(
+                f'/api/matches/{match.pk}/', {'score1': 1, 'score2': 2},
+                format='json',
+            )
+            changes = self.get_changes(tournament, since)
+
+            self.assertEqual(changes['sequence'], since + 1)
+            self.assertEqual(
+                {row['match']['code'] for row in changes['matches']},
+                {match.pk, final.pk},
+            )
+            since = changes['sequence']
+
+
+class PlaceTableTestCase(TestCase):
+    def play(self, tournament: Tournament) -> None:
+        client = get_organizer_client(tournament)
+
+        while matches := get_ready_matches(tournament):
+            for match in matches:
+                client.put(
+                    f'/api/matches/{match.pk}/', {'score1': 1, 'score2': 2},
+                    format='json',
+                )
+
+    def get_width(self, place: str) -> int:
+        first, _, last = place.partition('-')
+        return int(last or first) - int(first) + 1
+
+    def test_places_of_played_tournament(self):
+        for size in (5, 8, 9):
+            with self.subTest(size=size):
+                tournament = create_tournament(size)
+                self.play(tournament)
+
+                places = dict(
+                    Place.objects
+                    .filter(tournament=tournament)
+                    .values('place')
+                    .annotate(teams=Count('team', distinct=True))
+                    .values_list('place', 'teams')
+                )
+                self.assertEqual(places, {
+                    place: self.get_width(place)
+                    for place in ['1', *tournament.place_table] if place
+                })
+
+    def test_place_table_does_not_change_shared_bracket(self):
+        tournament = Tournament(place_table=get_bracket(5).get_places())
+
+        tournament.place_table[0] = 'changed'
+
+        self.assertNotEqual(get_bracket(5).get_places()[0], 'changed')
+
+    def test_place_table_lookup(self):
+        tournament = Tournament(
+            teams_total=9, place_table=get_bracket(9).get_places(),
+        )
+
+        self.assertEqual(
+            [tournament.get_place_by_round_lose(number)
+             for number in range(1, 5)],
+            ['7-9', '5-6', '3-4', '2'],
+        )
+        with self.assertRaises(ValueError):
+            tournament.get_place_by_round_lose(5)
+
+    def test_legacy_places(self):
+        # Tournaments activated before the place table
+        for size, places in (
+            (8, ['5-8', '3-4']),
+            (9, ['9-9', '5-8', '3-4']),
+            (16, ['9-16', '5-8', '3-4']),
+        ):
+            with self.subTest(size=size):
+                tournament = Tournament(teams_total=size)
+
+                self.assertEqual([
+                    tournament.get_place_by_round_lose(number)
+                    for number in range(1, len(places) + 1)
+                ], places)
+                with self.assertRaises(ValueError):
+                    tournament.get_place_by_round_lose(len(places) + 1)
+
+
+class ActivationTestCase(TestCase):
+    def test_team_registered_during_activation_fails_tournament(self):
+        tournament = create_tournament(4, activate=False, limit=8)
+
+        def register_and_build(*args, **kwargs):
+            tournament.append_team(create_teams(1)[0])
+            return build_brackets(*args, **kwargs)
+
+        with patch(
+            'tournament.activation.build_brackets',
+            side_effect=register_and_build,
+        ):
+            report = activate_tournaments(
+                Tournament.objects.filter(pk=tournament.pk), processes=0,
+            )
+
+        tournament.refresh_from_db()
+
+        self.assertEqual(report.activated, [])
+        self.assertIn(tournament.pk, report.failed)
+        self.assertEqual(tournament.status, Tournament.StatusChoice.OPENED)
+        self.assertEqual(tournament.teams_total, 5)
+        self.assertFalse(Round.objects.filter(tournament=tournament).exists())
+
+
+class BracketJobTestCase(TestCase):
+    def activate(self, client, tournament):
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.put(f'/api/tournaments/{tournament.pk}/activate/')
+
+    def test_job_sets_teams_of_bracket(self):
+        tournament = create_tournament(5, activate=False, limit=8)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tournament.activate()
+            # Team is added before the job, bypassing the registration
+            tournament.teams.add(create_teams(1)[0])
+
+        tournament.refresh_from_db()
+
+        self.assertEqual(tournament.teams_total, 6)
+        self.assertEqual(tournament.place_table, get_bracket(6).get_places())
+        self.assertEqual(
+            Round.objects.filter(tournament=tournament).count(),
+            len(get_bracket(6)),
+        )
+
+    def test_stale_tournament_is_activated_once(self):
+        tournament = create_tournament(4, activate=False, limit=8)
+        stale = Tournament.objects.get(pk=tournament.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tournament.activate()
+
+        with self.assertRaises(ValidationError):
+            stale.activate()
+        with self.assertRaises(ValidationError):
+            stale.append_team(create_teams(1)[0])
+
+        self.assertEqual(tournament.bracket_jobs.count(), 1)
+
+    def test_failed_job_reopens_tournament(self):
+        tournament = create_tournament(4, activate=False)
+        client = get_organizer_client(tournament)
+
+        # Eager task error is stored, not raised
+        with patch(
+            'tournament.tasks.initialize_bracket',
+            side_effect=RuntimeError('failure'),
+        ):
+            self.activate(client, tournament)
+
+        tournament.refresh_from_db()
+        self.assertEqual(tournament.status, Tournament.StatusChoice.OPENED)
+        self.assertEqual(
+            tournament.bracket_jobs.get().status,
+            BracketJob.StatusChoice.FAILED,
+        )
+
+        response = self.activate(client, tournament)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(
+            client.get(
+                f'/api/tournaments/{tournament.pk}/activation/',
+            ).data['status'],
+            BracketJob.StatusChoice.DONE.label,
+        )
+        self.assertTrue(Round.objects.filter(tournament=tournament).exists())
@@ -1,12 +1,33 @@
 from django.urls import path, include
 from rest_framework.routers import SimpleRouter
 
-from tournament.views import TournamentViewSet
+from tournament import views
 
 
 router = SimpleRouter()
-router.register('tournaments', TournamentViewSet)
+router.register('tournaments', views.TournamentViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path(
+        'tournaments/<str:pk>/stream/', views.stream_bracket,
+        name='tournament-stream',
+    ),
+    path(
+        'exports/<str:kind>/', views.ExportView.as_view(),
+        name='export',
+    ),
+
+    path(
+        'async/tournaments/', views.async_list_tournaments,
+        name='async-tournament-list',
+    ),
+    path(
+        'async/tournaments/<str:pk>/', views.async_retrieve_tournament,
+        name='async-tournament-detail',
+    ),
+    path(
+        'async/tournaments/<str:pk>/matches/', views.async_get_matches,
+        name='async-tournament-matches',
+    ),
 ]
@@ -8,10 +8,10 @@ def place_value_validator(value):
     
     For more information check provided raises error.
     """
-    if not value.isdigit() and match(r'^\d{1,2}-\d{1,2}$', value):
+    if not value.isdigit() and not match(r'^\d{1,4}-\d{1,4}$', value):
         raise ValidationError(
             _(
                 'The place values must de a digit string or matches with '
-                '99-99 pattern, but %(value)s was given.',
+                '9999-9999 pattern, but %(value)s was given.',
             ), params={'value': value}
         )
@@ -1,24 +1,51 @@
-from django.http import QueryDict, Http404
+from typing import Optional
+from django.http import (
+    QueryDict, Http404, JsonResponse,
+    StreamingHttpResponse, HttpResponseNotAllowed,
+)
 from rest_framework import status, mixins
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.permissions import (
-    IsAuthenticatedOrReadOnly, IsAuthenticated,
+    IsAuthenticatedOrReadOnly, IsAuthenticated, IsAdminUser,
 )
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
 
-from utils.pagination import PageNumberPagination
+from utils.pagination import KeysetPagination, apaginate
+from utils.views import async_read_view, SparseQuerysetMixin
+from utils.serializers import get_sparse_queryset
+from utils.conditional import version_etag
 from account.serializers import TeamSerializer
 from account.models import Team
 
 from tournament.models import Tournament
 from tournament.permissions import IsOrganizerOrReadOnlyPermission
+from tournament.advancement import settle_round_results
+from tournament.live import stream_bracket_events
+from tournament.exports import (
+    EXPORTS, OUTPUTS, get_export_rows, render_export,
+)
+from tournament.snapshots import (
+    get_bracket_snapshot,
+    build_bracket_snapshot,
+    get_bracket_changes,
+    aget_bracket_snapshot,
+    abuild_bracket_snapshot,
+    get_tree_snapshot,
+    build_tree_snapshot,
+    build_bracket_tree,
+    is_bracket_cached,
+    stream_bracket_rounds,
+    astream_bracket_rounds,
+)
 from tournament import serializers
 
 
 class TournamentViewSet(
+    SparseQuerysetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -26,7 +53,7 @@ class TournamentViewSet(
 ):
     queryset = Tournament.objects.all()
     serializer_class = serializers.RetrieveTournamentSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = KeysetPagination
     permission_classes = (
         IsAuthenticatedOrReadOnly,
         IsOrganizerOrReadOnlyPermission,
@@ -38,10 +65,14 @@ class TournamentViewSet(
 
         return super().get_serializer_class()
 
+    @version_etag(Tournament)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         if isinstance(request.data, QueryDict):
             request.data._mutable = True
-        request.data['organizer'] = request.user.code
+        request.data['organizer'] = request.user.pk
 
         return super().create(request, *args, **kwargs)
 
@@ -50,11 +81,17 @@ class TournamentViewSet(
         url_name='teams', url_path='teams',
         serializer_class=TeamSerializer,
     )
+    @version_etag(Tournament)
     def get_teams(self, request, *args, **kwargs):
         instance = self.get_object()
 
-        return Response(
-            self.get_serializer(instance.teams.all(), many=True).data,
+        queryset = get_sparse_queryset(
+            instance.teams.order_by('name'), self.get_serializer(),
+        )
+
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(
+            self.get_serializer(page, many=True).data,
         )
 
     @action(
@@ -80,41 +117,290 @@ class TournamentViewSet(
 
         return Response(status=status.HTTP_201_CREATED)
 
+    @action(
+        methods=['POST'], detail=True,
+        url_name='team-bulk-register', url_path='register/bulk',
+        serializer_class=serializers.BulkTeamRegisterSerializer,
+    )
+    def register_teams(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            teams, errors = instance.append_teams(
+                serializer.validated_data['teams'],
+            )
+        except ValidationError as err:
+            return Response({
+                'details': err,
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'registered': [team.code for team in teams],
+            'errors': errors,
+        }, status=(
+            status.HTTP_201_CREATED if teams
+            else status.HTTP_400_BAD_REQUEST
+        ))
+
     @action(
         methods=['PUT'], detail=True,
         url_name='activate', url_path='activate',
+        serializer_class=serializers.BracketJobSerializer,
     )
     def activate_tournament(self, request, *args, **kwargs):
         instance = self.get_object()
 
         try:
-            instance.activate()
+            job = instance.activate()
         except ValidationError as err:
             return Response({
                 'details': err,
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(self.get_serializer(instance).data)
+        return Response(
+            self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED,
+        )
+
+    @action(
+        methods=['GET'], detail=True,
+        url_name='activation', url_path='activation',
+        serializer_class=serializers.BracketJobSerializer,
+    )
+    def get_activation(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        job = instance.bracket_jobs.first()
+        if job is None:
+            raise Http404
+
+        return Response(self.get_serializer(job).data)
+
+    @action(
+        methods=['POST'], detail=True,
+        url_name='round-results', url_path='results',
+        serializer_class=serializers.RoundResultsSerializer,
+    )
+    def submit_round_results(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            places = settle_round_results(
+                instance,
+                serializer.validated_data['round'],
+                serializer.validated_data['results'],
+            )
+        except ValidationError as err:
+            return Response({
+                'details': err,
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            serializers.PlaceSerializer(places, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
 
     @action(
         methods=['GET'], detail=True,
         url_name='matches', url_path='matches',
         serializer_class=serializers.TournamentRoundSerializer,
     )
+    @version_etag(Tournament)
     def get_matches(self, request, *args, **kwargs):
+        if 'since' in request.query_params:
+            return self.get_match_changes(request)
+
+        query = serializers.BracketQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        # Version is read by the ETag check, before any bracket data
+        version = self.etag_versions and self.etag_versions[0]
+
+        if query.validated_data['layout'] == 'tree':
+            return self.get_bracket_tree(
+                kwargs['pk'], version, query.validated_data.get('rounds'),
+            )
+
+        # Cached snapshot exists for the tournament with the bracket only
+        snapshot = get_bracket_snapshot(kwargs['pk'], version)
+
+        if snapshot is None:
+            instance = self.get_object()
+
+            if instance.status == Tournament.StatusChoice.OPENED:
+                raise Http404
+
+            if not is_bracket_cached(instance.teams_total):
+                return StreamingHttpResponse(
+                    stream_bracket_rounds(instance.pk),
+                    content_type='application/json',
+                )
+
+            snapshot = build_bracket_snapshot(instance.pk, version)
+
+        return Response(snapshot)
+
+    def get_bracket_tree(
+        self, code: str, version: Optional[int], rounds: Optional[int],
+    ):
+        """Bracket adjacency arrays, the whole tree is cached."""
+        tree = get_tree_snapshot(code, version) if rounds is None else None
+
+        if tree is None:
+            instance = self.get_object()
+
+            if instance.status == Tournament.StatusChoice.OPENED:
+                raise Http404
+
+            tree = (
+                build_tree_snapshot(instance.pk, version)
+                if rounds is None else build_bracket_tree(instance.pk, rounds)
+            )
+
+        return Response(tree)
+
+    def get_match_changes(self, request):
+        """Bracket rounds with matches changed after the `since` sequence."""
+        serializer = serializers.BracketChangesQuerySerializer(
+            data=request.query_params,
+        )
+        serializer.is_valid(raise_exception=True)
+
         instance = self.get_object()
 
         if instance.status == Tournament.StatusChoice.OPENED:
             raise Http404
 
-        queryset = (
-            instance.round_set.all()
-            .order_by('number')
-            .prefetch_related(
-                'match',
-                'match__participant1',
-                'match__participant2',
-            )
+        return Response(get_bracket_changes(
+            instance, serializer.validated_data['since'],
+        ))
+
+
+class ExportView(APIView):
+    """
+    Stream all rows of the tournaments, matches or places export.
+
+    Notes:
+        Rows are filtered by the date range and the status, the output is
+        rendered while the rows are read, in the constant memory.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, kind, format=None):
+        export = EXPORTS.get(kind)
+        if export is None:
+            raise Http404
+
+        query = serializers.ExportQuerySerializer(
+            data=request.query_params, context={'export': export},
+        )
+        query.is_valid(raise_exception=True)
+
+        output = query.validated_data.pop('output')
+        response = StreamingHttpResponse(
+            render_export(
+                export, get_export_rows(export, **query.validated_data),
+                output,
+            ),
+            content_type=OUTPUTS[output],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{kind}.{output}"'
+        )
+
+        return response
+
+
+async def stream_bracket(request, pk):
+    """
+    Stream the tournament bracket changes as server-sent events.
+
+    Notes:
+        Missed changes are sent first if the sequence of the last known one
+        is given by the `Last-Event-ID` header (reconnection) or the `since`
+        query parameter.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    since = request.headers.get('Last-Event-ID', request.GET.get('since'))
+    if since is not None:
+        serializer = serializers.BracketChangesQuerySerializer(
+            data={'since': since},
         )
 
-        return Response(self.get_serializer(queryset, many=True).data)
+        if not serializer.is_valid():
+            return JsonResponse(
+                {'details': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        since = serializer.validated_data['since']
+
+    tournament_status = await (
+        Tournament.objects
+        .filter(pk=pk)
+        .values_list('status', flat=True)
+        .afirst()
+    )
+
+    if tournament_status in (None, Tournament.StatusChoice.OPENED):
+        raise Http404
+
+    response = StreamingHttpResponse(
+        stream_bracket_events(pk, since),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+
+    return response
+
+
+@async_read_view
+async def async_list_tournaments(request):
+    return await apaginate(
+        request, Tournament.objects.all(),
+        serializers.RetrieveTournamentSerializer, KeysetPagination,
+    )
+
+
+@async_read_view
+async def async_retrieve_tournament(request, pk):
+    try:
+        instance = await Tournament.objects.aget(pk=pk)
+    except Tournament.DoesNotExist:
+        raise Http404
+
+    return serializers.RetrieveTournamentSerializer(instance).data
+
+
+@async_read_view
+async def async_get_matches(request, pk):
+    tournament_status, teams_total, version = await (
+        Tournament.objects
+        .filter(pk=pk)
+        .values_list('status', 'teams_total', 'version')
+        .afirst()
+    ) or (None, 0, None)
+
+    if tournament_status in (None, Tournament.StatusChoice.OPENED):
+        raise Http404
+
+    snapshot = await aget_bracket_snapshot(pk, version)
+
+    if snapshot is None:
+        if not is_bracket_cached(teams_total):
+            return StreamingHttpResponse(
+                astream_bracket_rounds(pk), content_type='application/json',
+            )
+
+        snapshot = await abuild_bracket_snapshot(pk, version)
+
+    return snapshot
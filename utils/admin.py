@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ProfilingRule
+
+
+@admin.register(ProfilingRule)
+class ProfilingRuleAdmin(admin.ModelAdmin):
+    list_display = ('route', 'rate', 'remaining', 'active', 'created')
+    list_filter = ('active',)
+    search_fields = ('route',)
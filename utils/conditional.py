@@ -0,0 +1,66 @@
+from functools import wraps
+from typing import Callable, Iterable
+from django.db import models
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import status
+
+
+def get_version_etag(format: str, versions: Iterable) -> str:
+    """Weak entity tag of the representation format and objects versions."""
+    tags = ['x' if version is None else str(version) for version in versions]
+
+    return 'W/' + quote_etag('-'.join([format, *tags]))
+
+
+def version_etag(
+    model: type[models.Model], *fields: str, lookup_url_kwarg: str = 'pk',
+) -> Callable:
+    """
+    Answer the view action with `304 Not Modified` if the object versions
+    match the `If-None-Match` header.
+
+    Notes:
+        Versions are read by the single `values_list` query, so the not
+        modified object is neither loaded nor serialized. ETag is set on the
+        successful responses only. Read versions are the view `etag_versions`
+        attribute, None if the object is not found.
+
+    Attributes:
+        model: model of the object looked up by the view.
+        fields: version fields of the object and its related objects
+            (`version`, `participant1__version`).
+        lookup_url_kwarg: URL keyword argument of the object primary key.
+    """
+    fields = fields or ('version',)
+
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            versions = (
+                model.objects
+                .filter(pk=kwargs[lookup_url_kwarg])
+                .values_list(*fields)
+                .order_by('pk')
+                .first()
+            )
+            view.etag_versions = versions
+
+            if versions is None:
+                return method(view, request, *args, **kwargs)
+
+            etag = get_version_etag(request.accepted_renderer.format, versions)
+
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = method(view, request, *args, **kwargs)
+
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+
+            response.headers['ETag'] = etag
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,291 @@
+import os
+import json
+import glob
+import threading
+from time import perf_counter
+from bisect import bisect_left
+from typing import Optional
+from collections import defaultdict
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+
+class MetricsRegistry:
+    """
+    Request metrics of the current process.
+
+    Notes:
+        Histogram buckets are counted separately and accumulated on
+        rendering. Metrics are dumped to the `METRICS_DIR` file of the
+        process, so the endpoint served by any worker aggregates all of
+        them.
+
+    Attributes:
+        duration_buckets: upper bounds of the latency buckets, seconds.
+        size_buckets: upper bounds of the response size buckets, bytes.
+    """
+
+    def __init__(
+        self, duration_buckets: tuple[float, ...],
+        size_buckets: tuple[float, ...],
+    ) -> None:
+        self.duration_buckets = duration_buckets
+        self.size_buckets = size_buckets
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.flushed = perf_counter()
+
+        self.requests: dict[tuple, int] = defaultdict(int)
+        self.durations: dict[tuple, list] = {}
+        self.sizes: dict[tuple, list] = {}
+
+    @staticmethod
+    def observe_histogram(
+        histograms: dict[tuple, list], key: tuple,
+        buckets: tuple[float, ...], value: float,
+    ) -> None:
+        # Bucket counts, then the observations count and sum
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [0] * (len(buckets) + 3)
+
+        histogram[bisect_left(buckets, value)] += 1
+        histogram[-2] += 1
+        histogram[-1] += value
+
+    def observe(
+        self, route: str, method: str, status: int, duration: float,
+        size: Optional[int],
+    ) -> None:
+        key = (route, method)
+
+        with self.lock:
+            self.requests[(route, method, str(status))] += 1
+            self.observe_histogram(
+                self.durations, key, self.duration_buckets, duration,
+            )
+
+            if size is not None:
+                self.observe_histogram(
+                    self.sizes, key, self.size_buckets, size,
+                )
+
+    def dump(self) -> dict:
+        with self.lock:
+            return {
+                'requests': [
+                    [*key, count] for key, count in self.requests.items()
+                ],
+                'durations': [
+                    [*key, list(histogram)]
+                    for key, histogram in self.durations.items()
+                ],
+                'sizes': [
+                    [*key, list(histogram)]
+                    for key, histogram in self.sizes.items()
+                ],
+            }
+
+    def get_path(self) -> str:
+        return os.path.join(settings.METRICS_DIR, f'{self.pid}.json')
+
+    def flush(self) -> None:
+        """Replace the process metrics file, readers never see a part."""
+        self.flushed = perf_counter()
+        path = self.get_path()
+
+        with open(f'{path}.tmp', 'w') as stream:
+            json.dump(self.dump(), stream)
+        os.replace(f'{path}.tmp', path)
+
+    def flush_expired(self) -> None:
+        if (
+            settings.METRICS_DIR
+            and perf_counter() - self.flushed
+            >= settings.METRICS_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+
+_registry: Optional[MetricsRegistry] = None
+
+
+def get_registry() -> MetricsRegistry:
+    """Return the registry of the current process, a forked one is new."""
+    global _registry
+
+    if _registry is None or _registry.pid != os.getpid():
+        _registry = MetricsRegistry(
+            settings.METRICS_DURATION_BUCKETS, settings.METRICS_SIZE_BUCKETS,
+        )
+
+    return _registry
+
+
+def collect_metrics() -> dict:
+    """Sum metrics of all the processes, of the current one without dir."""
+    registry = get_registry()
+
+    if not settings.METRICS_DIR:
+        dumps = [registry.dump()]
+    else:
+        registry.flush()
+        dumps = []
+
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            try:
+                with open(path) as stream:
+                    dumps.append(json.load(stream))
+            except (OSError, ValueError):
+                # Removed by the cleanup
+                continue
+
+    requests: dict[tuple, int] = defaultdict(int)
+    durations: dict[tuple, list] = {}
+    sizes: dict[tuple, list] = {}
+
+    for dump in dumps:
+        for *key, count in dump['requests']:
+            requests[tuple(key)] += count
+
+        for histograms, rows in (
+            (durations, dump['durations']), (sizes, dump['sizes']),
+        ):
+            for route, method, histogram in rows:
+                total = histograms.setdefault(
+                    (route, method), [0] * len(histogram),
+                )
+                for index, value in enumerate(histogram):
+                    total[index] += value
+
+    return {'requests': requests, 'durations': durations, 'sizes': sizes}
+
+
+def escape_label(value: str) -> str:
+    return (
+        value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    )
+
+
+def render_histogram(
+    name: str, description: str, histograms: dict[tuple, list],
+    buckets: tuple[float, ...],
+) -> list[str]:
+    lines = [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+
+    for (route, method), histogram in sorted(histograms.items()):
+        labels = 'route="{}",method="{}"'.format(
+            escape_label(route), escape_label(method),
+        )
+
+        cumulative = 0
+        for bound, count in zip((*buckets, '+Inf'), histogram[:-2]):
+            cumulative += count
+            lines.append(
+                f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}',
+            )
+
+        lines.append(f'{name}_sum{{{labels}}} {histogram[-1]}')
+        lines.append(f'{name}_count{{{labels}}} {histogram[-2]}')
+
+    return lines
+
+
+def render_metrics(metrics: dict) -> str:
+    """Render metrics in the Prometheus text exposition format."""
+    lines = [
+        '# HELP http_requests_total Requests count by route, method and '
+        'status.',
+        '# TYPE http_requests_total counter',
+    ]
+
+    for (route, method, status), count in sorted(
+        metrics['requests'].items(),
+    ):
+        lines.append(
+            'http_requests_total{{route="{}",method="{}",status="{}"}} {}'
+            .format(
+                escape_label(route), escape_label(method), status, count,
+            )
+        )
+
+    lines += render_histogram(
+        'http_request_duration_seconds',
+        'Time to the response (headers of the streaming one), seconds.',
+        metrics['durations'], settings.METRICS_DURATION_BUCKETS,
+    )
+    lines += render_histogram(
+        'http_response_size_bytes',
+        'Response body size, streaming responses are not counted.',
+        metrics['sizes'], settings.METRICS_SIZE_BUCKETS,
+    )
+
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """
+    Record the request count, latency and response size by the resolved
+    route name.
+
+    Notes:
+        Requests of no route are recorded as the `unresolved` route, so
+        scanned URLs do not grow the labels count. Should be the first
+        middleware to measure the others too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, perf_counter() - started)
+
+        return response
+
+    async def __acall__(self, request: HttpRequest):
+        started = perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, perf_counter() - started)
+
+        return response
+
+    @staticmethod
+    def observe(
+        request: HttpRequest, response: HttpResponse, duration: float,
+    ) -> None:
+        match = request.resolver_match
+        registry = get_registry()
+
+        registry.observe(
+            match.view_name if match else 'unresolved',
+            request.method, response.status_code, duration,
+            None if response.streaming else len(response.content),
+        )
+        registry.flush_expired()
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Metrics of all the server processes for the Prometheus scraper."""
+    if settings.METRICS_TOKEN and not constant_time_compare(
+        request.headers.get('Authorization', ''),
+        f'Bearer {settings.METRICS_TOKEN}',
+    ):
+        return HttpResponse(status=401)
+
+    return HttpResponse(
+        render_metrics(collect_metrics()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
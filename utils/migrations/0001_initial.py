@@ -0,0 +1,31 @@
+# Generated by Django 4.2.6 on 2026-10-18 12:35
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfilingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('route', models.CharField(help_text='Resolved URL name, e.g. "tournament-matches".', max_length=128, verbose_name='route')),
+                ('rate', models.FloatField(default=1.0, help_text='Profiled part of the route requests.', validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(1.0)], verbose_name='rate')),
+                ('remaining', models.PositiveIntegerField(default=1, help_text='Profiles to record, the rule is off at zero.', verbose_name='remaining profiles')),
+                ('active', models.BooleanField(default=True, verbose_name='active')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='date created')),
+            ],
+            options={
+                'verbose_name': 'profiling rule',
+                'verbose_name_plural': 'profiling rules',
+                'ordering': ['-created'],
+            },
+        ),
+    ]
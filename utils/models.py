@@ -1,2 +1,76 @@
 from django.db import models
+from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils.translation import gettext_lazy as _
 
+
+class VersionedModel(models.Model):
+    """
+    Model with the version counter incremented on every save.
+
+    Notes:
+        Saved row version is incremented by the database and read back, so
+        concurrent saves never get the same version. Queryset updates do
+        not call `save`, so they must increment the version explicitly
+        (`version=F('version') + 1`).
+    """
+
+    version = models.PositiveIntegerField(
+        _('version'), default=0,
+        help_text=_('Incremented on every update, used for conditional GET.'),
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.version += 1
+            return super().save(*args, **kwargs)
+
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+
+        previous = self.version
+        self.version = models.F('version') + 1
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            # Failed transaction can not be read, the version is not saved
+            self.version = previous
+            raise
+        else:
+            self.refresh_from_db(fields=['version'])
+
+
+class ProfilingRule(models.Model):
+    """
+    Requests of the route to run under the sampling profiler.
+
+    Notes:
+        Every request of the route is profiled with the `rate` probability
+        until `remaining` profiles are recorded.
+    """
+
+    route = models.CharField(
+        _('route'), max_length=128,
+        help_text=_('Resolved URL name, e.g. "tournament-matches".'),
+    )
+    rate = models.FloatField(
+        _('rate'), default=1.0,
+        validators=[MinValueValidator(0.0), MaxValueValidator(1.0)],
+        help_text=_('Profiled part of the route requests.'),
+    )
+    remaining = models.PositiveIntegerField(
+        _('remaining profiles'), default=1,
+        help_text=_('Profiles to record, the rule is off at zero.'),
+    )
+    active = models.BooleanField(_('active'), default=True)
+    created = models.DateTimeField(_('date created'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('profiling rule')
+        verbose_name_plural = _('profiling rules')
+        ordering = ['-created']
+
+    def __str__(self) -> str:
+        return self.route
@@ -1,9 +1,282 @@
+import json
+import math
+import base64
+import binascii
+from typing import Optional
+from django.db import connections
+from django.db.models import F, Q, QuerySet
+from django.http import HttpRequest, Http404
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import (
-    PageNumberPagination as BasePageNumberPagination
+    BasePagination, PageNumberPagination as BasePageNumberPagination,
+    _positive_int,
 )
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.utils.urls import replace_query_param, remove_query_param
 
 
 class PageNumberPagination(BasePageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
     page_size = 10
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination by the composite key of the queryset ordering.
+
+    Notes:
+        Page starts after the ordering values of the previous page edge
+        row, so any page costs the same index range scan as the first one
+        given the index of the ordering columns. Primary key is appended to
+        the ordering to make the key unique. Nulls go where the database
+        puts them in its own ordering, so the ordering index is used as is.
+        Cursor is opaque, there is no page count.
+
+    Attributes:
+        cursor_query_param: query parameter of the page cursor.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = _('Invalid cursor')
+
+    def get_page_size(self, request: HttpRequest) -> int:
+        try:
+            return _positive_int(
+                request.GET[self.page_size_query_param],
+                strict=True, cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    @staticmethod
+    def get_ordering(queryset: QuerySet) -> list[str]:
+        ordering = list(
+            queryset.query.order_by or queryset.model._meta.ordering
+        )
+        pk_names = ('pk', queryset.model._meta.pk.name)
+
+        if not any(name.lstrip('-') in pk_names for name in ordering):
+            ordering.append('pk')
+
+        return ordering
+
+    def decode_cursor(self, request: HttpRequest) -> Optional[tuple]:
+        """Return ordering values and the backward flag of the cursor."""
+        encoded = request.GET.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values, reverse = cursor['v'], bool(cursor['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values, reverse
+
+    def encode_cursor(self, values: list, reverse: bool) -> str:
+        cursor = json.dumps(
+            {'v': values, 'r': int(reverse)},
+            default=str, separators=(',', ':'),
+        )
+        encoded = base64.urlsafe_b64encode(cursor.encode()).decode()
+
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded,
+        )
+
+    def get_position_filter(
+        self, ordering: list[str], values: list, nulls_largest: bool,
+    ) -> Q:
+        """
+        Filter rows following the given ordering values, that is
+        `(a, b, ...) > (x, y, ...)` with every column direction and nulls.
+
+        Notes:
+            The implied `a >= x` bound is added if no nulls follow `x`, so
+            the ordering index scan starts at the position instead of
+            filtering the preceding rows.
+        """
+        position = Q(pk__in=[])
+        equal = Q()
+        bound = Q()
+
+        first, value = ordering[0], values[0]
+        if value is not None and first.startswith('-') == nulls_largest:
+            lookup = 'lte' if first.startswith('-') else 'gte'
+            bound = Q(**{f'{first.lstrip("-")}__{lookup}': value})
+
+        for name, value in zip(ordering, values):
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+
+            if value is None:
+                # Null is the greatest or the least value
+                following = (
+                    Q(**{f'{name}__isnull': False})
+                    if descending == nulls_largest else Q(pk__in=[])
+                )
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                lookup = 'lt' if descending else 'gt'
+                following = Q(**{f'{name}__{lookup}': value})
+
+                if descending != nulls_largest:
+                    following |= Q(**{f'{name}__isnull': True})
+
+                same = Q(**{name: value})
+
+            position |= equal & following
+            equal &= same
+
+        return bound & position
+
+    def get_page_queryset(
+        self, queryset: QuerySet, request: HttpRequest,
+    ) -> QuerySet:
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.cursor = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if self.cursor is not None and self.cursor[1]:
+            ordering = [
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in ordering
+            ]
+
+        if self.cursor is not None:
+            queryset = queryset.filter(self.get_position_filter(
+                ordering, self.cursor[0],
+                connections[queryset.db].features.nulls_order_largest,
+            ))
+
+        # Cursor values are read with the page, deferred or not joined
+        # columns are not loaded by the row afterwards
+        return queryset.annotate(**{
+            f'keyset_{index}': F(name.lstrip('-'))
+            for index, name in enumerate(self.ordering)
+        }).order_by(*ordering)[:self.page_size + 1]
+
+    def get_page(self, rows: list) -> list:
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if self.cursor is not None and self.cursor[1]:
+            rows.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = self.cursor is not None, has_more
+
+        self.next = self.previous = None
+        if rows and has_next:
+            self.next = self.encode_cursor(self.get_values(rows[-1]), False)
+        if rows and has_previous:
+            self.previous = self.encode_cursor(
+                self.get_values(rows[0]), True,
+            )
+
+        return rows
+
+    def get_values(self, row) -> list:
+        return [
+            getattr(row, f'keyset_{index}')
+            for index in range(len(self.ordering))
+        ]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(
+        self, queryset: QuerySet, request: HttpRequest,
+    ) -> list:
+        queryset = self.get_page_queryset(queryset, request)
+
+        return self.get_page([row async for row in queryset])
+
+    def get_paginated_data(self, data) -> dict:
+        return {
+            'next': self.next,
+            'previous': self.previous,
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+async def apaginate(
+    request: HttpRequest, queryset: QuerySet,
+    serializer_class: type[BaseSerializer],
+    pagination_class: type[BasePagination] = PageNumberPagination,
+) -> dict:
+    """
+    Paginate the queryset by the async ORM for the plain async views.
+
+    Notes:
+        Query parameters and the response data are the same as of the
+        `pagination_class` used by the DRF views.
+    """
+    paginator = pagination_class()
+
+    if isinstance(paginator, KeysetPagination):
+        try:
+            results = await paginator.apaginate_queryset(queryset, request)
+        except NotFound as err:
+            raise Http404(err.detail)
+
+        return paginator.get_paginated_data(
+            serializer_class(results, many=True).data,
+        )
+
+    page_size = paginator.get_page_size(Request(request))
+
+    try:
+        number = int(request.GET.get(paginator.page_query_param, 1))
+    except ValueError:
+        number = 0
+
+    count = await queryset.acount()
+    pages = max(math.ceil(count / page_size), 1)
+
+    if not 0 < number <= pages:
+        raise Http404(paginator.invalid_page_message)
+
+    offset = (number - 1) * page_size
+    results = [item async for item in queryset[offset:offset + page_size]]
+
+    url = request.build_absolute_uri()
+    return {
+        'count': count,
+        'next': (
+            replace_query_param(url, paginator.page_query_param, number + 1)
+            if number < pages else None
+        ),
+        'previous': (
+            None if number == 1 else
+            remove_query_param(url, paginator.page_query_param)
+            if number == 2 else
+            replace_query_param(url, paginator.page_query_param, number - 1)
+        ),
+        'results': serializer_class(results, many=True).data,
+    }
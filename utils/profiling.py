@@ -0,0 +1,299 @@
+import os
+import re
+import sys
+import random
+import threading
+from time import perf_counter
+from typing import Optional
+from collections import Counter
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from django.core import signing
+from django.db.models import F
+from django.http import FileResponse, Http404, HttpRequest
+from django.urls import resolve, Resolver404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+
+from utils.models import ProfilingRule
+
+
+PROFILE_HEADER = 'X-Profile'
+TOKEN_SALT = 'utils.profiling'
+PROFILE_NAME = re.compile(r'^[\w.-]+\.folded$')
+
+
+class SamplingProfiler:
+    """
+    Sample the thread stack by the background thread.
+
+    Notes:
+        Stacks are counted in the collapsed format (`outer;inner count`) of
+        the flame graph tools. Profiled thread is not traced, its cost is
+        the sampler thread holding the GIL for the sample only.
+
+    Attributes:
+        thread_id: profiled thread identifier.
+        interval: sampling interval, seconds.
+    """
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+
+            while frame is not None:
+                code = frame.f_code
+                stack.append('{} ({}:{})'.format(
+                    code.co_qualname, code.co_filename, code.co_firstlineno,
+                ))
+                frame = frame.f_back
+
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def get_collapsed(self) -> str:
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.items()
+        )
+
+
+_rules: tuple[float, dict[str, tuple[int, float]]] = (0.0, {})
+
+
+def get_loaded_rules() -> Optional[dict[str, tuple[int, float]]]:
+    """Return the rules if they are loaded within the TTL, None if not."""
+    expires, rules = _rules
+    return rules if perf_counter() < expires else None
+
+
+def get_rules() -> dict[str, tuple[int, float]]:
+    """
+    Return primary keys and rates of the active rules by route, the rules
+    are reloaded every `PROFILE_RULES_TTL` seconds.
+    """
+    global _rules
+
+    rules = get_loaded_rules()
+    if rules is None:
+        rules = {
+            route: (pk, rate) for pk, route, rate in (
+                ProfilingRule.objects
+                .filter(active=True, remaining__gt=0)
+                .values_list('pk', 'route', 'rate')
+            )
+        }
+        _rules = (perf_counter() + settings.PROFILE_RULES_TTL, rules)
+
+    return rules
+
+
+def claim_rule(pk: int) -> bool:
+    """Take one of the rule remaining profiles, across the processes."""
+    return bool(
+        ProfilingRule.objects
+        .filter(pk=pk, active=True, remaining__gt=0)
+        .update(remaining=F('remaining') - 1)
+    )
+
+
+def get_profile_token(user_pk) -> str:
+    return signing.dumps(user_pk, salt=TOKEN_SALT)
+
+
+def is_profile_token(token: str) -> bool:
+    try:
+        signing.loads(
+            token, salt=TOKEN_SALT, max_age=settings.PROFILE_TOKEN_MAX_AGE,
+        )
+    except signing.BadSignature:
+        return False
+
+    return True
+
+
+def save_profile(route: str, profiler: SamplingProfiler) -> str:
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+
+    name = '{}-{}-{}.folded'.format(
+        timezone.now().strftime('%Y%m%dT%H%M%S%f'),
+        re.sub(r'[^\w-]', '_', route), os.getpid(),
+    )
+    with open(os.path.join(settings.PROFILE_DIR, name), 'w') as stream:
+        stream.write(profiler.get_collapsed())
+
+    return name
+
+
+class ProfilingMiddleware:
+    """
+    Run the request under the sampling profiler on demand.
+
+    Notes:
+        Request is profiled if it has the `X-Profile` header of the staff
+        token or an active `ProfilingRule` of its route samples it. The
+        route is resolved only then, otherwise the cost is the header and
+        the in-process rules lookup, the rules are queried once per
+        `PROFILE_RULES_TTL` seconds. ASGI requests run their sync code
+        (sync views, async ORM queries) in the thread of the request thread
+        sensitive context, that thread is sampled, the async views code of
+        the event loop is not.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        route = self.get_profiled_route(request)
+        if route is None:
+            return self.get_response(request)
+
+        profiler = SamplingProfiler(
+            threading.get_ident(), settings.PROFILE_INTERVAL,
+        )
+        profiler.start()
+
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+
+        response['X-Profile-Name'] = save_profile(route, profiler)
+        return response
+
+    async def __acall__(self, request: HttpRequest):
+        # Not profiled request does not wait for the sync thread
+        if (
+            request.headers.get(PROFILE_HEADER) is None
+            and get_loaded_rules() == {}
+        ):
+            return await self.get_response(request)
+
+        route, thread_id = await sync_to_async(self.get_profiled_thread)(
+            request,
+        )
+        if route is None:
+            return await self.get_response(request)
+
+        profiler = SamplingProfiler(thread_id, settings.PROFILE_INTERVAL)
+        profiler.start()
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.stop()
+
+        response['X-Profile-Name'] = await sync_to_async(save_profile)(
+            route, profiler,
+        )
+        return response
+
+    def get_profiled_thread(
+        self, request: HttpRequest,
+    ) -> tuple[Optional[str], int]:
+        """Profiled route and the current, request sync code, thread."""
+        return self.get_profiled_route(request), threading.get_ident()
+
+    @staticmethod
+    def get_profiled_route(request: HttpRequest) -> Optional[str]:
+        token = request.headers.get(PROFILE_HEADER)
+        rules = get_rules()
+
+        if token is None and not rules:
+            return None
+
+        try:
+            route = resolve(request.path_info).view_name
+        except Resolver404:
+            return None
+
+        if token is not None:
+            return route if is_profile_token(token) else None
+
+        rule = rules.get(route)
+        if (
+            rule is None
+            or random.random() >= rule[1]
+            or not claim_rule(rule[0])
+        ):
+            return None
+
+        return route
+
+
+class ProfileTokenView(APIView):
+    """Token of the `X-Profile` header, profiles the requests having it."""
+
+    permission_classes = (IsAdminUser,)
+
+    def post(self, request, format=None):
+        return Response({
+            'header': PROFILE_HEADER,
+            'token': get_profile_token(request.user.pk),
+            'max_age': settings.PROFILE_TOKEN_MAX_AGE,
+        }, status=status.HTTP_201_CREATED)
+
+
+class ProfileListView(APIView):
+    """Recorded profiles, the latest first."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, format=None):
+        try:
+            names = os.listdir(settings.PROFILE_DIR)
+        except FileNotFoundError:
+            names = []
+
+        profiles = []
+        for name in sorted(names, reverse=True):
+            if PROFILE_NAME.match(name):
+                stat = os.stat(os.path.join(settings.PROFILE_DIR, name))
+                profiles.append({'name': name, 'size': stat.st_size})
+
+        return Response(profiles)
+
+
+class ProfileDownloadView(APIView):
+    """Collapsed stacks file of the profile."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, name, format=None):
+        path = os.path.join(settings.PROFILE_DIR, name)
+
+        if not PROFILE_NAME.match(name) or not os.path.isfile(path):
+            raise Http404
+
+        return FileResponse(
+            open(path, 'rb'), as_attachment=True, filename=name,
+            content_type='text/plain',
+        )
@@ -0,0 +1,190 @@
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from functools import cache
+from typing import Optional
+from collections import defaultdict
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+class Subscription(ABC):
+    """
+    Channel subscription, messages are received from the time it is entered.
+
+    Notes:
+        `get` returns None if the subscription has lost messages (slow
+        subscriber), the subscriber should resynchronize its state then.
+    """
+
+    async def __aenter__(self) -> 'Subscription':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self) -> Optional[str]:
+        pass
+
+
+class Broker(ABC):
+    """Publish/subscribe broker of the text messages."""
+
+    @abstractmethod
+    def publish(self, channel: str, message: str) -> None:
+        """Send the message to the channel subscribers from the sync code."""
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> Subscription:
+        pass
+
+    def has_subscribers(self, channel: str) -> bool:
+        """Publishers skip building the messages nobody listens to."""
+        return True
+
+
+class LocalSubscription(Subscription):
+    def __init__(self, broker: 'LocalBroker', channel: str) -> None:
+        self.broker = broker
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(broker.queue_size)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def __aenter__(self) -> 'LocalSubscription':
+        self.loop = asyncio.get_running_loop()
+
+        with self.broker.lock:
+            self.broker.subscriptions[self.channel].add(self)
+
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        with self.broker.lock:
+            subscriptions = self.broker.subscriptions[self.channel]
+            subscriptions.discard(self)
+
+            if not subscriptions:
+                del self.broker.subscriptions[self.channel]
+
+    def put(self, message: str) -> None:
+        """Enqueue the message, called in the subscription loop."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Overflowed subscriber is told to resynchronize
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[str]:
+        return await self.queue.get()
+
+
+class LocalBroker(Broker):
+    """
+    In-process broker, subscribers must run in the publisher process.
+
+    Notes:
+        Serves the single process ASGI deployment and the tests. Messages
+        are passed to the subscriber event loops thread-safely, so they can
+        be published by the sync views as well.
+
+    Attributes:
+        queue_size: not received messages count to keep per subscriber.
+    """
+
+    def __init__(self, queue_size: int = 100) -> None:
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.subscriptions: dict[str, set[LocalSubscription]] = (
+            defaultdict(set)
+        )
+
+    def publish(self, channel: str, message: str) -> None:
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.put, message,
+                )
+            except RuntimeError:
+                # Subscriber loop is closed, it is unsubscribed on exit
+                pass
+
+    def subscribe(self, channel: str) -> LocalSubscription:
+        return LocalSubscription(self, channel)
+
+    def has_subscribers(self, channel: str) -> bool:
+        with self.lock:
+            return channel in self.subscriptions
+
+
+class RedisSubscription(Subscription):
+    def __init__(self, broker: 'RedisBroker', channel: str) -> None:
+        self.broker = broker
+        self.channel = channel
+        self.pubsub = None
+
+    async def __aenter__(self) -> 'RedisSubscription':
+        self.pubsub = self.broker.async_client.pubsub(
+            ignore_subscribe_messages=True,
+        )
+        await self.pubsub.subscribe(self.channel)
+
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.pubsub.unsubscribe(self.channel)
+        await self.pubsub.close()
+
+    async def get(self) -> Optional[str]:
+        while True:
+            message = await self.pubsub.get_message(timeout=None)
+
+            if message is not None:
+                return message['data'].decode()
+
+
+class RedisBroker(Broker):
+    """
+    Redis broker, shares messages between the server processes.
+
+    Notes:
+        Needs the `redis` package installed.
+
+    Attributes:
+        url: Redis server URL.
+    """
+
+    def __init__(self, url: str = 'redis://localhost:6379/0') -> None:
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError as err:
+            raise ImproperlyConfigured(
+                'RedisBroker requires the "redis" package.',
+            ) from err
+
+        self.client = redis.Redis.from_url(url)
+        self.async_client = redis.asyncio.Redis.from_url(url)
+
+    def publish(self, channel: str, message: str) -> None:
+        self.client.publish(channel, message)
+
+    def subscribe(self, channel: str) -> RedisSubscription:
+        return RedisSubscription(self, channel)
+
+    def has_subscribers(self, channel: str) -> bool:
+        return any(
+            count for _channel, count in self.client.pubsub_numsub(channel)
+        )
+
+
+@cache
+def get_broker() -> Broker:
+    """Return the broker configured by `PUBSUB_BACKEND` settings."""
+    return import_string(settings.PUBSUB_BACKEND)(**settings.PUBSUB_OPTIONS)
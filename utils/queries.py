@@ -0,0 +1,251 @@
+import re
+import random
+import logging
+from time import perf_counter
+from functools import lru_cache
+from contextlib import ExitStack
+from collections import Counter
+from typing import AsyncIterator, Iterator, Optional
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from django.db import connections, DatabaseError
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+
+
+logger = logging.getLogger(__name__)
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PARAMETERS = re.compile(r'%s(?:\s*,\s*%s)+')
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """
+    Statement of the query with any parameters, literals and `IN` lists
+    are replaced by the placeholders.
+    """
+    return PARAMETERS.sub('%s, ...', LITERALS.sub('%s', sql))
+
+
+class QueryStats:
+    """
+    Queries executed while handling the request, the database connections
+    execute wrapper.
+
+    Attributes:
+        request: handled request, its view is reported by the slow queries.
+    """
+
+    def __init__(self, request: HttpRequest) -> None:
+        self.request = request
+        self.count = 0
+        self.time = 0.0
+        self.statements: Counter = Counter()
+        self.slowest: Optional[tuple] = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - started
+            statement = normalize_sql(sql)
+
+            self.count += 1
+            self.time += duration
+            self.statements[statement] += 1
+
+            if duration >= settings.SLOW_QUERY_THRESHOLD:
+                logger.warning(
+                    'Slow query %.1f ms in %s: %s',
+                    duration * 1000, self.view_name, statement,
+                )
+
+                if self.slowest is None or duration > self.slowest[0]:
+                    self.slowest = (
+                        duration, sql, params, many,
+                        context['connection'].alias,
+                    )
+
+    @property
+    def view_name(self) -> str:
+        match = self.request.resolver_match
+        return match.view_name if match else 'unresolved'
+
+    @property
+    def duplicates(self) -> int:
+        """Executions of the repeated statements, but the first ones."""
+        return sum(count - 1 for count in self.statements.values())
+
+    def get_server_timing(self) -> str:
+        return 'db;dur={:.2f};desc="{} queries, {} repeated"'.format(
+            self.time * 1000, self.count, self.duplicates,
+        )
+
+    def log_duplicates(self) -> None:
+        for statement, count in self.statements.items():
+            if count > settings.QUERY_DUPLICATES_THRESHOLD:
+                logger.warning(
+                    'Statement executed %d times in %s: %s',
+                    count, self.view_name, statement,
+                )
+
+    def log_explain(self) -> None:
+        """Log the query plan of the slowest query, of the SELECT only."""
+        _duration, sql, params, many, alias = self.slowest
+
+        if many or not sql.lstrip().upper().startswith('SELECT'):
+            return
+
+        connection = connections[alias]
+        prefix = connection.ops.explain_query_prefix()
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'{prefix} {sql}', params)
+                plan = '\n'.join(
+                    ' '.join(map(str, row)) for row in cursor.fetchall()
+                )
+        except DatabaseError:
+            # Transaction is broken or the statement is not explainable
+            return
+
+        logger.warning(
+            'Slowest query plan in %s: %s\n%s',
+            self.view_name, normalize_sql(sql), plan,
+        )
+
+
+class QueryStatsMiddleware:
+    """
+    Record SQL queries count, time and repeated statements of the request.
+
+    Notes:
+        Staff users get them by the `Server-Timing` header. Queries slower
+        than `SLOW_QUERY_THRESHOLD` are logged with the view name, the
+        plan of the slowest one is logged for `SLOW_QUERY_EXPLAIN_RATE` of
+        the requests. Statements repeated over
+        `QUERY_DUPLICATES_THRESHOLD` times are logged as the N+1 suspects.
+        ASGI requests run their sync code (sync views, async ORM queries)
+        in the thread of the request thread sensitive context, so the
+        connections of that thread are instrumented. Streamed responses
+        are instrumented till their content ends and are logged then,
+        they get no `Server-Timing` header, it is sent before the content.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        stats = QueryStats(request)
+
+        with self.instrument(stats):
+            response = self.get_response(request)
+
+        if response.streaming:
+            self.wrap_stream(response, stats)
+        else:
+            self.report(request, response, stats)
+
+        return response
+
+    async def __acall__(self, request: HttpRequest):
+        stats = QueryStats(request)
+        stack = await sync_to_async(self.instrument)(stats)
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+
+        if response.streaming:
+            self.wrap_stream(response, stats)
+        else:
+            # Lazy user and the plan query need the sync thread as well
+            await sync_to_async(self.report)(request, response, stats)
+
+        return response
+
+    @staticmethod
+    def instrument(stats: QueryStats) -> ExitStack:
+        """Wrap the current thread connections till the stack is closed."""
+        stack = ExitStack()
+
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+
+        return stack
+
+    @classmethod
+    def wrap_stream(
+        cls, response: StreamingHttpResponse, stats: QueryStats,
+    ) -> None:
+        """Instrument the streamed content iteration, sync or async one."""
+        if response.is_async:
+            response.streaming_content = cls.astream(
+                response.streaming_content, stats,
+            )
+        else:
+            response.streaming_content = cls.stream(
+                response.streaming_content, stats,
+            )
+
+    @classmethod
+    def stream(
+        cls, content: Iterator[bytes], stats: QueryStats,
+    ) -> Iterator[bytes]:
+        try:
+            with cls.instrument(stats):
+                yield from content
+        finally:
+            cls.log(stats)
+
+    @classmethod
+    async def astream(
+        cls, content: AsyncIterator[bytes], stats: QueryStats,
+    ) -> AsyncIterator[bytes]:
+        stack = await sync_to_async(cls.instrument)(stats)
+
+        try:
+            async for part in content:
+                yield part
+        finally:
+            await sync_to_async(stack.close)()
+            await sync_to_async(cls.log)(stats)
+
+    @classmethod
+    def report(
+        cls, request: HttpRequest, response: HttpResponse,
+        stats: QueryStats,
+    ) -> None:
+        user = getattr(request, 'user', None)
+
+        if stats.count and (
+            settings.DEBUG or (user is not None and user.is_staff)
+        ):
+            response['Server-Timing'] = stats.get_server_timing()
+
+        cls.log(stats)
+
+    @staticmethod
+    def log(stats: QueryStats) -> None:
+        """Log the repeated statements and the sampled slowest plan."""
+        stats.log_duplicates()
+
+        if (
+            stats.slowest is not None
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+        ):
+            stats.log_explain()
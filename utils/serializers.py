@@ -0,0 +1,189 @@
+import re
+from typing import Optional
+from django.db.models import QuerySet
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+DISPLAY_SOURCE = re.compile(r'^get_(\w+)_display$')
+
+
+def parse_names(value: Optional[str]) -> Optional[list[str]]:
+    if value is None:
+        return None
+
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldsMixin:
+    """
+    Model serializer with the fields selection and the relations expansion.
+
+    Notes:
+        Selection is given by the `fields` and `expand` arguments or, for
+        the root serializer, by the same safe request query parameters.
+        `fields` names limit the output, `relation.field` names limit the
+        nested relation output. Relations listed by `expand` are nested,
+        other ones are serialized as primary keys. Output is the default
+        one without the selection. Unknown names are rejected by the
+        `ValidationError` of the parameter, before any query.
+
+    Examples:
+        ?fields=code,status,participant1.name&expand=participant1
+    """
+
+    def __init__(self, *args, fields=None, expand=None, prefix='',
+                 **kwargs):
+        self.selection = (fields, expand)
+        self.prefix = prefix
+        super().__init__(*args, **kwargs)
+
+    def get_selection(self) -> tuple[Optional[list], Optional[list]]:
+        fields, expand = self.selection
+
+        root = self.parent is None or (
+            isinstance(self.parent, serializers.ListSerializer)
+            and self.parent.parent is None
+        )
+        request = self.context.get('request')
+
+        if (
+            fields is None and expand is None and root
+            and request is not None and request.method in SAFE_METHODS
+        ):
+            fields = parse_names(request.query_params.get('fields'))
+            expand = parse_names(request.query_params.get('expand'))
+
+        return fields, expand
+
+    def validate_selection(
+        self, fields: dict, selected: Optional[list], expand: Optional[list],
+    ) -> None:
+        errors = {}
+
+        unknown = [
+            self.prefix + name for name in selected or ()
+            if name.partition('.')[0] not in fields
+        ]
+        if unknown:
+            errors['fields'] = _('Unknown fields: %(names)s.') % {
+                'names': ', '.join(unknown),
+            }
+
+        unknown = [
+            name for name in expand or ()
+            if not isinstance(fields.get(name), serializers.BaseSerializer)
+        ]
+        if unknown:
+            errors['expand'] = _('Unknown relations: %(names)s.') % {
+                'names': ', '.join(unknown),
+            }
+
+        if errors:
+            raise serializers.ValidationError(errors)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected, expand = self.get_selection()
+        self.validate_selection(fields, selected, expand)
+
+        nested_selected: dict[str, list[str]] = {}
+        if selected is not None:
+            for name in selected:
+                relation, _dot, nested = name.partition('.')
+
+                if nested:
+                    nested_selected.setdefault(relation, []).append(nested)
+
+            names = {name.partition('.')[0] for name in selected}
+            fields = {
+                name: field for name, field in fields.items() if name in names
+            }
+
+        for name, field in list(fields.items()):
+            if not isinstance(field, serializers.BaseSerializer):
+                continue
+
+            expanded = (
+                expand is None or name in expand or name in nested_selected
+            )
+
+            if not expanded:
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True, source=field.source,
+                )
+            elif name in nested_selected:
+                fields[name] = field.__class__(
+                    *field._args, fields=nested_selected[name],
+                    prefix=f'{self.prefix}{name}.', **field._kwargs,
+                )
+
+        return fields
+
+
+def get_queryset_paths(
+    serializer: serializers.ModelSerializer, prefix: str = '',
+) -> tuple[list[str], Optional[list[str]]]:
+    """
+    Return `select_related` relations and `only` columns the serializer
+    output needs, columns are None if some field source is not a column.
+    """
+    model = serializer.Meta.model
+    related: list[str] = []
+    only: Optional[list[str]] = []
+
+    for field in serializer.fields.values():
+        if field.source == '*':
+            return related, None
+
+        name = field.source_attrs[0]
+        match = DISPLAY_SOURCE.match(name)
+
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            if match is None:
+                return related, None
+
+            name = match.group(1)
+            model_field = model._meta.get_field(name)
+
+        if model_field.many_to_many or model_field.one_to_many:
+            # Not a column, the relation is loaded by its own query
+            continue
+
+        if isinstance(field, serializers.ModelSerializer):
+            related.append(prefix + name)
+            nested_related, nested_only = get_queryset_paths(
+                field, f'{prefix}{name}__',
+            )
+            related += nested_related
+
+            if nested_only is None:
+                only = None
+            elif only is not None:
+                only += [prefix + name, *nested_only]
+        elif only is not None:
+            only.append(prefix + name)
+
+    return related, only
+
+
+def get_sparse_queryset(
+    queryset: QuerySet, serializer: serializers.ModelSerializer,
+) -> QuerySet:
+    """
+    Join the relations expanded by the serializer only and defer columns it
+    does not output.
+    """
+    related, only = get_queryset_paths(serializer)
+
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    if only is not None:
+        queryset = queryset.only(*only)
+
+    return queryset
@@ -0,0 +1,165 @@
+from itertools import count
+from typing import Any, Callable, Iterable, Optional
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, modify_settings
+from rest_framework.test import APIClient
+
+from account.models import User, Team
+from match.models import Match
+from tournament.models import Tournament
+from tournament.activation import activate_tournaments
+
+
+_sequence = count()
+# Random user ids collide within the thousands of the bulk created users
+_uids = count()
+
+
+def get_uid() -> str:
+    return f'{next(_uids):06d}'
+
+
+def create_user(email: Optional[str] = None, **fields) -> User:
+    """Create the user of the unique id, fields are of `create_user`."""
+    uid = get_uid()
+
+    return User.objects.create_user(
+        email=email or f'user{uid}@example.com', uid=uid, **fields,
+    )
+
+
+def create_teams(teams_count: int) -> list[Team]:
+    """Insert teams of two new users each by the bulk inserts."""
+    number = next(_sequence)
+
+    users = User.objects.bulk_create(
+        User(
+            uid=get_uid(),
+            email=f'user{number}x{index}@example.com',
+            first_name='first', last_name='last', password='!',
+        ) for index in range(teams_count * 2)
+    )
+
+    return Team.objects.bulk_create(
+        Team(
+            name=f't{number}x{index}',
+            mate1=users[index * 2], mate2=users[index * 2 + 1],
+        ) for index in range(teams_count)
+    )
+
+
+def create_tournament(
+    teams_count: int, organizer: Optional[User] = None,
+    activate: bool = True, limit: Optional[int] = None,
+) -> Tournament:
+    """
+    Create the tournament with the given registered teams count, activated
+    one has the bracket.
+    """
+    number = next(_sequence)
+    if organizer is None:
+        organizer = create_user()
+
+    tournament = Tournament.objects.create(
+        name=f'tournament{number}', description='description',
+        organizer=organizer, limit=limit or max(teams_count, 4),
+    )
+
+    if teams_count:
+        teams = create_teams(teams_count)
+        tournament.append_teams([team.pk for team in teams])
+
+    if activate:
+        activate_tournaments(
+            Tournament.objects.filter(pk=tournament.pk), processes=0,
+        )
+
+    tournament.refresh_from_db()
+    return tournament
+
+
+def get_client(user: Optional[User] = None) -> APIClient:
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+
+    return client
+
+
+def get_organizer_client(tournament: Tournament) -> APIClient:
+    return get_client(User.objects.get(pk=tournament.organizer_id))
+
+
+def async_get(path: str):
+    """Send the GET request by the async client, to the async views."""
+    return async_to_sync(AsyncClient().get)(path)
+
+
+def get_ready_matches(tournament: Tournament) -> list[Match]:
+    """Scheduled matches of the tournament having both participants."""
+    return list(
+        Match.objects
+        .filter(
+            round__tournament=tournament,
+            status=Match.StatusChoice.SCHEDULED,
+            participant1__isnull=False, participant2__isnull=False,
+        )
+        .order_by('round__number', 'code')
+    )
+
+
+@modify_settings(
+    MIDDLEWARE={'remove': ['utils.profiling.ProfilingMiddleware']},
+)
+class QueryBudgetTestCase(TestCase):
+    """
+    Endpoints queries count must not depend on the data size.
+
+    Notes:
+        Profiling middleware is removed, it reloads its rules by the query
+        once in a while. Cache is cleared before every test, so cached
+        responses are built by the measured request.
+
+    Attributes:
+        sizes: teams counts of the tournaments every budget is checked for.
+    """
+
+    sizes: Iterable[int] = (4, 16, 64)
+
+    def setUp(self):
+        cache.clear()
+
+    def assertQueryBudget(
+        self, budget: int, request: Callable[[Any], object],
+        status_code: int = 200, activate: bool = True,
+        prepare: Optional[Callable[[Tournament], Any]] = None,
+        sizes: Optional[Iterable[int]] = None,
+        check: Optional[Callable[[Any, Any], None]] = None,
+    ) -> None:
+        """
+        Assert the request of the tournament of every size executes the
+        `budget` queries.
+
+        Attributes:
+            request: sends the request and returns the response, gets the
+                tournament or the value prepared of it.
+            prepare: creates the request data of the tournament, its queries
+                are not counted.
+            check: asserts the response body, gets the response and the
+                value the request got, its queries are not counted.
+        """
+        for size in sizes or self.sizes:
+            tournament = create_tournament(size, activate=activate)
+            value = tournament if prepare is None else prepare(tournament)
+
+            with self.subTest(size=size), self.assertNumQueries(budget):
+                response = request(value)
+
+            self.assertEqual(
+                response.status_code, status_code,
+                getattr(response, 'data', response),
+            )
+
+            if check is not None:
+                check(response, value)
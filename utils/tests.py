@@ -1,3 +1,212 @@
-from django.test import TestCase
+import os
+import json
+import shutil
+import tempfile
+from asgiref.sync import async_to_sync
+from django.test import (
+    AsyncClient,
+    SimpleTestCase, TestCase, modify_settings, override_settings,
+)
+from rest_framework import serializers
 
-# Create your tests here.
+from account.models import User
+from utils.views import stream_json_list, astream_json_list
+from utils.testing import (
+    async_get, create_tournament, create_user, get_client, get_ready_matches,
+)
+from utils.profiling import PROFILE_HEADER, get_profile_token
+
+
+class RowSerializer(serializers.Serializer):
+    value = serializers.IntegerField()
+
+
+class StreamJsonListTestCase(SimpleTestCase):
+    batch_size = 100
+    counts = (0, 1, 99, 100, 200, 250)
+
+    def get_rows(self, count: int) -> list[dict]:
+        return [{'value': index} for index in range(count)]
+
+    def test_stream(self):
+        for count in self.counts:
+            with self.subTest(count=count):
+                content = b''.join(stream_json_list(
+                    self.get_rows(count), RowSerializer(), self.batch_size,
+                ))
+
+                self.assertEqual(json.loads(content), self.get_rows(count))
+
+    def test_async_stream(self):
+        async def rows(count):
+            for row in self.get_rows(count):
+                yield row
+
+        async def collect(count):
+            return b''.join([
+                chunk async for chunk in astream_json_list(
+                    rows(count), RowSerializer(), self.batch_size,
+                )
+            ])
+
+        for count in self.counts:
+            with self.subTest(count=count):
+                content = async_to_sync(collect)(count)
+
+                self.assertEqual(json.loads(content), self.get_rows(count))
+
+
+@override_settings(QUERY_DUPLICATES_THRESHOLD=0)
+@modify_settings(
+    MIDDLEWARE={'remove': ['debug_toolbar.middleware.DebugToolbarMiddleware']},
+)
+class QueryStatsAsgiTestCase(TestCase):
+    """
+    Every statement is logged, of the sync and async views under ASGI.
+
+    Notes:
+        Sync only debug toolbar middleware makes the whole chain sync, it
+        is removed to run the middleware as the async one.
+    """
+
+    def setUp(self):
+        self.tournament = create_tournament(4)
+
+    def assertInstrumented(self, path: str, view_name: str) -> None:
+        with self.assertLogs('utils.queries') as logs:
+            self.assertEqual(async_get(path).status_code, 200)
+
+        for line in logs.output:
+            self.assertIn(f' in {view_name}: ', line)
+
+    def test_sync_view(self):
+        self.assertInstrumented(
+            f'/api/tournaments/{self.tournament.pk}/teams/',
+            'tournament-teams',
+        )
+
+    def test_async_view(self):
+        self.assertInstrumented(
+            f'/api/async/tournaments/{self.tournament.pk}/matches/',
+            'async-tournament-matches',
+        )
+
+    @override_settings(BRACKET_SNAPSHOT_MAX_MATCHES=2)
+    def test_async_streamed_view(self):
+        async def read(content) -> bytes:
+            return b''.join([chunk async for chunk in content])
+
+        response = async_get(
+            f'/api/async/tournaments/{self.tournament.pk}/matches/',
+        )
+
+        # Rounds are read while the content is streamed
+        with self.assertLogs('utils.queries') as logs:
+            async_to_sync(read)(response.streaming_content)
+
+        self.assertTrue(any(
+            'FROM "tournament_round"' in line
+            and ' in async-tournament-matches: ' in line
+            for line in logs.output
+        ), logs.output)
+
+
+@override_settings(QUERY_DUPLICATES_THRESHOLD=0)
+class QueryStatsStreamingTestCase(TestCase):
+    """Queries of the streamed content are logged once it is read."""
+
+    def test_export(self):
+        create_tournament(4)
+        client = get_client(User.objects.create_superuser(
+            email='admin@example.com', password='password',
+        ))
+
+        response = client.get('/api/exports/matches/')
+
+        with self.assertLogs('utils.queries') as logs:
+            content = b''.join(response.streaming_content)
+
+        self.assertEqual(len(content.splitlines()), 3)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn(' in export: SELECT "match_match"', logs.output[0])
+
+
+@modify_settings(
+    MIDDLEWARE={'remove': ['debug_toolbar.middleware.DebugToolbarMiddleware']},
+)
+class ProfilingAsgiTestCase(TestCase):
+    """Requests of the profile token are profiled under ASGI."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+        self.tournament = create_tournament(4)
+        self.token = get_profile_token(create_user().pk)
+
+    def assertProfiled(self, path: str) -> None:
+        with self.settings(PROFILE_DIR=self.directory):
+            response = async_to_sync(AsyncClient().get)(
+                path, headers={PROFILE_HEADER: self.token},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.directory, response['X-Profile-Name']),
+        ))
+
+    def test_sync_view(self):
+        self.assertProfiled(f'/api/tournaments/{self.tournament.pk}/teams/')
+
+    def test_async_view(self):
+        self.assertProfiled(
+            f'/api/async/tournaments/{self.tournament.pk}/matches/',
+        )
+
+
+class SparseFieldsTestCase(TestCase):
+    def setUp(self):
+        self.match = get_ready_matches(create_tournament(4))[0]
+
+    def get(self, query: str):
+        return get_client().get(f'/api/matches/{self.match.pk}/?{query}')
+
+    def test_fields(self):
+        response = self.get('fields=code,score1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(), {'code': self.match.pk, 'score1': None},
+        )
+
+    def test_nested_fields(self):
+        response = self.get('fields=code,participant1.name')
+
+        self.assertEqual(response.json(), {
+            'code': self.match.pk,
+            'participant1': {'name': self.match.participant1.name},
+        })
+
+    def test_expand(self):
+        data = self.get('expand=participant1').json()
+
+        self.assertEqual(
+            data['participant1']['code'], self.match.participant1_id,
+        )
+        self.assertEqual(data['participant2'], self.match.participant2_id)
+
+    def test_unknown_names(self):
+        for query, errors in (
+            ('fields=code,nope', {'fields': 'Unknown fields: nope.'}),
+            ('fields=participant1.nope', {
+                'fields': 'Unknown fields: participant1.nope.',
+            }),
+            ('expand=score1,nope', {
+                'expand': 'Unknown relations: score1, nope.',
+            }),
+        ):
+            with self.subTest(query=query):
+                response = self.get(query)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), errors)
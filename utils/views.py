@@ -0,0 +1,164 @@
+from functools import wraps
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator
+from django.http import Http404, HttpResponse
+from django.http.response import HttpResponseBase
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import BaseSerializer
+
+from utils.serializers import get_sparse_queryset, parse_names
+
+
+def render(data, status_code: int = status.HTTP_200_OK) -> HttpResponse:
+    renderer = JSONRenderer()
+
+    return HttpResponse(
+        renderer.render(data), status=status_code,
+        content_type=renderer.media_type,
+    )
+
+
+def stream_json_list(
+    rows: Iterable, serializer: BaseSerializer, batch_size: int = 100,
+) -> Iterator[bytes]:
+    """
+    Render the JSON array of the serialized rows incrementally, only the
+    rows batch is held in memory.
+    """
+    renderer = JSONRenderer()
+    separator = b'['
+    batch = []
+
+    for row in rows:
+        batch.append(renderer.render(serializer.to_representation(row)))
+
+        if len(batch) == batch_size:
+            yield separator + b','.join(batch)
+            separator, batch = b',', []
+
+    # Rows count of the batch size multiple leaves no rows to separate
+    if batch or separator == b'[':
+        yield separator + b','.join(batch) + b']'
+    else:
+        yield b']'
+
+
+async def astream_json_list(
+    rows: AsyncIterable, serializer: BaseSerializer, batch_size: int = 100,
+) -> AsyncIterator[bytes]:
+    """Async `stream_json_list` of the rows loaded by the async ORM."""
+    renderer = JSONRenderer()
+    separator = b'['
+    batch = []
+
+    async for row in rows:
+        batch.append(renderer.render(serializer.to_representation(row)))
+
+        if len(batch) == batch_size:
+            yield separator + b','.join(batch)
+            separator, batch = b',', []
+
+    # Rows count of the batch size multiple leaves no rows to separate
+    if batch or separator == b'[':
+        yield separator + b','.join(batch) + b']'
+    else:
+        yield b']'
+
+
+def async_read_view(view: Callable) -> Callable:
+    """
+    Serve the async read-only view returning the response data.
+
+    Notes:
+        Plain Django async views are not processed by DRF, so the data is
+        rendered by the DRF JSON renderer and errors have the DRF shape, the
+        responses are the same as of the sync views. Returned response
+        (streaming one) is passed as is.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = render({
+                'detail': _('Method "%(method)s" not allowed.') % {
+                    'method': request.method,
+                },
+            }, status.HTTP_405_METHOD_NOT_ALLOWED)
+            response['Allow'] = 'GET, HEAD'
+            return response
+
+        try:
+            data = await view(request, *args, **kwargs)
+        except Http404 as err:
+            return render(
+                {'detail': str(err) or _('Not found.')},
+                status.HTTP_404_NOT_FOUND,
+            )
+
+        if isinstance(data, HttpResponseBase):
+            return data
+
+        return render(data)
+
+    return wrapper
+
+
+class SparseQuerysetMixin:
+    """
+    Join and load only what the serializer fields selection outputs for the
+    read actions.
+    """
+
+    sparse_actions = ('list', 'retrieve')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        if self.action in self.sparse_actions:
+            queryset = get_sparse_queryset(queryset, self.get_serializer())
+
+        return queryset
+
+
+class BatchRetrieveMixin:
+    """
+    List action answers the `codes` query parameter by the objects in the
+    request order.
+
+    Notes:
+        Objects are loaded by the single `IN` query, not found codes are
+        answered by the `{"code": ..., "detail": "Not found."}` markers.
+        Without the parameter the list action of the next class is used.
+    """
+
+    batch_query_param = 'codes'
+    batch_max_size = 100
+
+    def list(self, request, *args, **kwargs):
+        if self.batch_query_param not in request.query_params:
+            if not hasattr(super(), 'list'):
+                raise ValidationError({
+                    self.batch_query_param: _('This parameter is required.'),
+                })
+
+            return super().list(request, *args, **kwargs)
+
+        codes = parse_names(request.query_params[self.batch_query_param])
+        if not 0 < len(codes) <= self.batch_max_size:
+            raise ValidationError({
+                self.batch_query_param: _(
+                    'Give from 1 to %(count)d comma separated codes.'
+                ) % {'count': self.batch_max_size},
+            })
+
+        found = self.filter_queryset(self.get_queryset()).in_bulk(codes)
+        objects = [found[code] for code in codes if code in found]
+
+        data = iter(self.get_serializer(objects, many=True).data)
+        return Response([
+            next(data) if code in found else {
+                'code': code, 'detail': _('Not found.'),
+            } for code in codes
+        ])